@@ -0,0 +1,26 @@
+"""Add visitor sketch
+
+Revision ID: b7e2c41d9a3f
+Revises: 4cd7fd2d259b
+Create Date: 2026-10-19 10:12:31.482917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c41d9a3f'
+down_revision: Union[str, None] = '4cd7fd2d259b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('urls', sa.Column('visitor_sketch', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('urls', 'visitor_sketch')
@@ -0,0 +1,45 @@
+"""Add url prefixes
+
+Revision ID: d41a7c9e5b20
+Revises: b7e2c41d9a3f
+Create Date: 2026-10-19 15:47:08.216394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c9e5b20'
+down_revision: Union[str, None] = 'b7e2c41d9a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'url_prefixes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prefix', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('prefix'),
+    )
+    op.add_column('urls', sa.Column('prefix_id', sa.Integer(), nullable=True))
+    op.add_column('urls', sa.Column('url_suffix', sa.String(), nullable=True))
+    op.create_foreign_key('urls_prefix_id_fkey', 'urls', 'url_prefixes', ['prefix_id'], ['id'])
+    op.alter_column('urls', 'url', existing_type=sa.VARCHAR(), nullable=True)
+
+
+def downgrade() -> None:
+    # 압축된 항목을 원래 URL로 되돌린 뒤 컬럼을 삭제합니다.
+    op.execute(
+        "UPDATE urls SET url = url_prefixes.prefix || urls.url_suffix "
+        "FROM url_prefixes WHERE urls.prefix_id = url_prefixes.id"
+    )
+    op.alter_column('urls', 'url', existing_type=sa.VARCHAR(), nullable=False)
+    op.drop_constraint('urls_prefix_id_fkey', 'urls', type_='foreignkey')
+    op.drop_column('urls', 'url_suffix')
+    op.drop_column('urls', 'prefix_id')
+    op.drop_table('url_prefixes')
@@ -0,0 +1,32 @@
+"""Add trending snapshots
+
+Revision ID: e8b3f0d61c27
+Revises: d41a7c9e5b20
+Create Date: 2026-10-19 20:12:41.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f0d61c27'
+down_revision: Union[str, None] = 'd41a7c9e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'trending_snapshots',
+        sa.Column('worker_id', sa.String(), nullable=False),
+        sa.Column('snapshot', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('worker_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trending_snapshots')
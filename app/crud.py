@@ -1,9 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.sql import delete
-from . import models
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import bindparam, delete, func, insert, update
+from . import models, url_compression
+from .hll import HyperLogLog
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 async def create_url(db: AsyncSession, url: str, short_url: str, expiration_date: Optional[datetime]):
     """
@@ -11,6 +14,7 @@ async def create_url(db: AsyncSession, url: str, short_url: str, expiration_date
 
     주어진 단축 URL과 긴 URL, 선택적인 만료 날짜를 사용하여 새로운 URL 항목을 생성합니다.
     만료 날짜가 제공된 경우, 타임존 정보를 제거하고 저장합니다.
+    `URL_COMPRESSION=prefix` 설정에서는 URL을 등록된 공유 접두사 id와 접미사로 나누어 저장합니다.
 
     Args:
         db (AsyncSession): 데이터베이스 세션입니다.
@@ -25,19 +29,36 @@ async def create_url(db: AsyncSession, url: str, short_url: str, expiration_date
         if expiration_date.tzinfo is not None:
             expiration_date = expiration_date.replace(tzinfo=None)
     
-    db_url = models.URL(url=url, short_url=short_url, expiration_date=expiration_date)
+    prefix_id, suffix = None, url
+    if url_compression.URL_COMPRESSION == "prefix":
+        prefix_id, suffix = await url_compression.match_prefix(db, url)
+    if prefix_id is not None:
+        db_url = models.URL(prefix_id=prefix_id, url_suffix=suffix, short_url=short_url, expiration_date=expiration_date)
+    else:
+        db_url = models.URL(url=url, short_url=short_url, expiration_date=expiration_date)
     db.add(db_url)
     await db.commit()
     await db.refresh(db_url)
+    if db_url.url is None:
+        set_committed_value(db_url, "url", url)
     return db_url
 
 
+async def _expand_url(db: AsyncSession, db_url: models.URL):
+    # 접두사로 압축된 항목은 캐시된 접두사와 접미사를 이어 붙여 url 속성을 채웁니다.
+    # 변경으로 취급되지 않도록 커밋된 값으로 설정합니다.
+    if db_url.url is None and db_url.prefix_id is not None:
+        prefix = await url_compression.prefix_cache.get(db, db_url.prefix_id)
+        set_committed_value(db_url, "url", prefix + db_url.url_suffix)
+
+
 async def get_url_by_short_url(db: AsyncSession, short_url: str):
     """
     단축 URL을 기준으로 URL 항목을 조회합니다.
 
     제공된 단축 URL을 기준으로 데이터베이스에서 URL 항목을 조회합니다. 
     현재 시간이 만료 날짜보다 이전인 경우 URL을 반환합니다.
+    접두사로 압축된 항목은 접두사 캐시를 사용하여 원래 URL로 복원합니다.
 
     Args:
         db (AsyncSession): 데이터베이스 세션입니다.
@@ -51,30 +72,33 @@ async def get_url_by_short_url(db: AsyncSession, short_url: str):
     db_url = result.scalars().first()
     now = datetime.utcnow()
     if db_url and (db_url.expiration_date is None or db_url.expiration_date > now):
+        await _expand_url(db, db_url)
         return db_url
     return None
 
 
-async def increment_view_count(db: AsyncSession, short_url: str):
+async def increment_view_counts(db: AsyncSession, counts: Dict[str, int]):
     """
-    URL 항목의 조회 수를 증가시킵니다.
+    여러 URL 항목의 조회 수를 한 번에 증가시킵니다.
 
-    제공된 단축 URL을 기준으로 URL 항목을 조회하고, 조회 수를 증가시킵니다.
-    조회 수가 None인 경우 0으로 초기화한 후 증가시킵니다.
+    클릭 이벤트 묶음에서 집계한 단축 URL별 조회 수를 하나의 executemany UPDATE로 반영하므로,
+    조회 수를 읽어 오는 SELECT 없이 한 번의 커밋으로 처리됩니다. 여러 워커가 같은 행을 갱신해도
+    교착 상태가 생기지 않도록 항상 단축 URL 순서로 행 잠금을 얻습니다.
 
     Args:
         db (AsyncSession): 데이터베이스 세션입니다.
-        short_url (str): 조회 수를 증가시킬 단축 URL입니다.
+        counts (Dict[str, int]): 단축 URL별로 증가시킬 조회 수입니다.
     """
-    stmt = select(models.URL).filter(models.URL.short_url == short_url)
-    result = await db.execute(stmt)
-    db_url = result.scalars().first()
-    if db_url:
-        if db_url.view_count is None:
-            db_url.view_count = 0  # 조회 수가 None인 경우 0으로 초기화
-        db_url.view_count += 1
-        await db.commit()
-        await db.refresh(db_url)
+    if not counts:
+        return
+    table = models.URL.__table__
+    stmt = (
+        update(table)
+        .where(table.c.short_url == bindparam("b_short_url"))
+        .values(view_count=func.coalesce(table.c.view_count, 0) + bindparam("b_count"))
+    )
+    await db.execute(stmt, [{"b_short_url": short_url, "b_count": count} for short_url, count in sorted(counts.items())])
+    await db.commit()
 
 
 async def get_view_count(db: AsyncSession, short_url: str) -> Optional[int]:
@@ -97,6 +121,94 @@ async def get_view_count(db: AsyncSession, short_url: str) -> Optional[int]:
         return db_url.view_count
     return None
 
+
+async def get_url_stats(db: AsyncSession, short_url: str) -> Optional[Tuple[int, Optional[bytes]]]:
+    """
+    URL 항목의 조회 수와 고유 방문자 스케치를 한 번의 SELECT로 조회합니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+        short_url (str): 통계를 가져올 단축 URL입니다.
+
+    Returns:
+        Optional[Tuple[int, Optional[bytes]]]: 조회 수와 저장된 HyperLogLog 스케치를 반환하고,
+        URL이 존재하지 않거나 조회 수가 없으면 None을 반환합니다.
+    """
+    stmt = select(models.URL.view_count, models.URL.visitor_sketch).filter(models.URL.short_url == short_url)
+    result = await db.execute(stmt)
+    row = result.first()
+    if row is None or row.view_count is None:
+        return None
+    return row.view_count, row.visitor_sketch
+
+
+async def merge_visitor_sketches(db: AsyncSession, sketches: Dict[str, HyperLogLog]):
+    """
+    메모리에 누적된 고유 방문자 스케치를 데이터베이스에 일괄 병합합니다.
+
+    대상 URL 항목을 한 번에 조회하여 행 잠금을 건 뒤, 저장된 스케치와 레지스터별 최댓값으로
+    병합하고 한 번의 커밋으로 저장합니다. 행 잠금은 `increment_view_counts`와 같이 단축 URL
+    순서로 얻으므로, 여러 워커가 동시에 병합해도 교착 상태나 갱신 유실이 생기지 않습니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+        sketches (Dict[str, HyperLogLog]): 단축 URL별로 누적된 스케치입니다.
+    """
+    if not sketches:
+        return
+    stmt = (
+        select(models.URL)
+        .filter(models.URL.short_url.in_(list(sketches)))
+        .options(undefer(models.URL.visitor_sketch))
+        .order_by(models.URL.short_url)
+        .with_for_update()
+    )
+    result = await db.execute(stmt)
+    for db_url in result.scalars():
+        sketch = HyperLogLog.from_bytes(db_url.visitor_sketch)
+        sketch.merge(sketches[db_url.short_url])
+        db_url.visitor_sketch = sketch.to_bytes()
+    await db.commit()
+
+async def save_trending_snapshot(db: AsyncSession, worker_id: str, snapshot: bytes, stale_before: datetime):
+    """
+    워커의 인기 URL 스냅샷을 저장하고 오래된 스냅샷을 삭제합니다.
+
+    각 행은 한 워커만 갱신하므로 UPDATE로 갱신한 행이 없을 때만 INSERT합니다. 종료된 워커의
+    스냅샷은 `stale_before` 이후 갱신되지 않으므로 다른 워커의 다음 저장 시 함께 삭제됩니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+        worker_id (str): 스냅샷을 기록하는 워커 id입니다.
+        snapshot (bytes): 직렬화한 인기 URL 카운터입니다.
+        stale_before (datetime): 이 시각 이전에 갱신된 스냅샷은 삭제합니다.
+    """
+    table = models.TrendingSnapshot.__table__
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(table).where(table.c.worker_id == worker_id).values(snapshot=snapshot, updated_at=now)
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(table).values(worker_id=worker_id, snapshot=snapshot, updated_at=now))
+    await db.execute(delete(table).where(table.c.updated_at < stale_before))
+    await db.commit()
+
+
+async def get_trending_snapshots(db: AsyncSession) -> Dict[str, bytes]:
+    """
+    모든 워커의 인기 URL 스냅샷을 조회합니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+
+    Returns:
+        Dict[str, bytes]: 워커 id별 직렬화한 인기 URL 카운터입니다.
+    """
+    table = models.TrendingSnapshot.__table__
+    result = await db.execute(select(table.c.worker_id, table.c.snapshot))
+    return dict(result.all())
+
+
 async def delete_expired_urls(db: AsyncSession):
     """
     만료된 URL 항목을 삭제합니다.
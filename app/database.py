@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 import os
+from .profiling import install_slow_query_log
 
 load_dotenv()
 
@@ -12,9 +13,9 @@ print(DATABASE_URL)
 Base = declarative_base()
 
 engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
-
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
 
+# SLOW_QUERY_MS가 설정된 경우에만 느린 쿼리 로그 리스너를 등록합니다.
+SLOW_QUERY_MS = os.getenv("SLOW_QUERY_MS")
+if SLOW_QUERY_MS:
+    install_slow_query_log(engine, float(SLOW_QUERY_MS))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
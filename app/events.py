@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+from collections import Counter
+from typing import List, NamedTuple, Optional
+
+from .hll import HyperLogLog, VisitorSketchBuffer
+from .storage import create_storage
+from .trending import TrendingTracker
+
+logger = logging.getLogger(__name__)
+
+# 클릭 이벤트 파이프라인 설정입니다. CLICK_PIPELINE=process 이면 별도 프로세스에서 이벤트를 처리합니다.
+CLICK_PIPELINE = os.getenv("CLICK_PIPELINE", "task")
+CLICK_QUEUE_SIZE = int(os.getenv("CLICK_QUEUE_SIZE", "10000"))
+CLICK_BATCH_SIZE = int(os.getenv("CLICK_BATCH_SIZE", "500"))
+CLICK_FLUSH_INTERVAL = float(os.getenv("CLICK_FLUSH_INTERVAL", "0.5"))
+CLICK_MAX_RETRIES = int(os.getenv("CLICK_MAX_RETRIES", "20"))
+
+
+class ClickEvent(NamedTuple):
+    """
+    리디렉션 한 번에 대한 클릭 이벤트입니다.
+
+    Attributes:
+        short_url (str): 조회된 단축 URL입니다.
+        visitor_hash (int): 방문자 지문의 64비트 해시 값입니다.
+    """
+    short_url: str
+    visitor_hash: int
+
+
+class ClickWriter:
+    """
+    클릭 이벤트 묶음을 집계하여 데이터베이스에 반영합니다.
+
+    조회 수는 묶음마다 단축 URL별로 합산하여 한 번에 증가시키고, 고유 방문자 스케치는
+    `VisitorSketchBuffer`에 모아 두었다가 기준에 도달하면 병합합니다. `trending`이 주어지면
+    합산한 조회 수로 인기 URL 스케치도 갱신합니다.
+
+    Attributes:
+        storage (StorageBackend): 이벤트를 반영할 저장소 백엔드입니다.
+        trending (Optional[TrendingTracker]): 조회 수를 기록할 인기 URL 추적기입니다.
+        max_retries (int): 반영에 실패한 조회 수와 스케치를 버리기 전까지 다시 시도할 횟수입니다.
+        visitor_sketches (VisitorSketchBuffer): 아직 저장되지 않은 방문자 스케치입니다.
+    """
+
+    def __init__(self, storage, trending: Optional[TrendingTracker] = None, max_retries: int = CLICK_MAX_RETRIES):
+        self.storage = storage
+        self.trending = trending
+        self.max_retries = max_retries
+        self.visitor_sketches = VisitorSketchBuffer()
+        self._unwritten_counts: Counter = Counter()
+        self._failures = 0
+
+    async def write(self, events: List[ClickEvent], final: bool = False):
+        """
+        클릭 이벤트 묶음을 데이터베이스에 반영합니다.
+
+        반영에 실패한 조회 수와 스케치는 보관했다가 다음 묶음과 합쳐 다시 반영합니다. 연속으로
+        `max_retries`번을 넘게 실패하거나 마지막 반영에 실패하면 로그를 남기고 버려서, 데이터베이스
+        장애가 길어져도 메모리가 계속 늘어나지 않도록 합니다.
+
+        Args:
+            events (List[ClickEvent]): 반영할 클릭 이벤트 목록입니다.
+            final (bool): True이면 대기 중인 방문자 스케치를 모두 저장합니다.
+        """
+        counts = Counter(event.short_url for event in events)
+        if self.trending is not None:
+            for short_url, count in counts.items():
+                self.trending.record(short_url, count)
+        counts.update(self._unwritten_counts)
+        self._unwritten_counts = Counter()
+        for event in events:
+            self.visitor_sketches.add(event.short_url, event.visitor_hash)
+        sketches = {}
+        if final or self.visitor_sketches.should_flush():
+            sketches = self.visitor_sketches.drain()
+        if not counts and not sketches:
+            return
+        try:
+            if counts:
+                await self.storage.increment(counts)
+                counts = None
+            if sketches:
+                await self.storage.merge_visitor_sketches(sketches)
+        except Exception:
+            self._failures += 1
+            if final or self._failures > self.max_retries:
+                logger.exception("Dropping unwritten click counts and sketches after %d failed writes", self._failures)
+                self._failures = 0
+                return
+            logger.exception("Failed to write click events, retrying with the next batch")
+            if counts:
+                self._unwritten_counts = counts
+            self.visitor_sketches.restore(sketches)
+        else:
+            self._failures = 0
+
+
+class ClickPipeline:
+    """
+    리디렉션 이후의 부수 작업을 요청 처리와 분리하는 비동기 이벤트 파이프라인입니다.
+
+    요청 핸들러는 `enqueue`로 클릭 이벤트를 큐에 넣고 바로 응답하며, 같은 이벤트 루프의 워커
+    태스크가 이벤트를 묶음 단위로 꺼내 `ClickWriter`로 반영합니다. 큐가 가득 차면 `enqueue`가
+    빈 자리가 생길 때까지 대기하여 생산 속도를 제한합니다.
+
+    Attributes:
+        batch_size (int): 한 번에 처리할 최대 이벤트 수입니다.
+        flush_interval (float): 이벤트가 없을 때 대기 중인 스케치를 확인하는 주기(초)입니다.
+    """
+
+    def __init__(self, storage, maxsize: int = CLICK_QUEUE_SIZE, batch_size: int = CLICK_BATCH_SIZE,
+                 flush_interval: float = CLICK_FLUSH_INTERVAL, trending: Optional[TrendingTracker] = None):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = ClickWriter(storage, trending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """
+        이벤트를 처리하는 워커 태스크를 시작합니다.
+        """
+        self._queue = asyncio.Queue(self.maxsize)
+        self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, event: ClickEvent):
+        """
+        클릭 이벤트를 큐에 넣습니다. 큐가 가득 차면 자리가 생길 때까지 대기합니다.
+
+        Raises:
+            RuntimeError: 파이프라인이 시작되지 않은 경우 발생합니다.
+        """
+        if self._queue is None:
+            raise RuntimeError("Click pipeline is not running")
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            await self._queue.put(event)
+
+    async def stop(self):
+        """
+        큐에 남은 이벤트와 대기 중인 스케치를 모두 반영한 뒤 워커 태스크를 종료합니다.
+        """
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._queue = None
+        self._task = None
+
+    def estimate_unique_visitors(self, short_url: str, stored: Optional[bytes]) -> int:
+        """
+        저장된 스케치와 워커에 대기 중인 스케치를 합쳐 고유 방문자 수를 추정합니다.
+        """
+        return self.writer.visitor_sketches.estimate(short_url, stored)
+
+    async def _run(self):
+        while True:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.writer.write([])
+                continue
+            batch = [event]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            stopping = None in batch
+            await self.writer.write([event for event in batch if event is not None], final=stopping)
+            if stopping:
+                return
+
+
+class ProcessClickPipeline:
+    """
+    클릭 이벤트를 별도 프로세스에서 처리하는 파이프라인입니다.
+
+    `ClickPipeline`과 같은 인터페이스를 제공하지만, 이벤트를 multiprocessing 큐로 전달하여
+    데이터베이스 쓰기와 스케치 병합이 웹 프로세스의 CPU를 사용하지 않도록 합니다. 워커 프로세스는
+    `create_storage`로 자체 저장소 백엔드를 생성하며, 대기 중인 스케치는 저장된 후에야 통계에
+    반영됩니다. 인기 URL 추적기는 `/stats/top`을 응답하는 웹 프로세스에 있어야 하므로, 이
+    모드에서는 이벤트를 큐에 넣을 때 기록합니다.
+    """
+
+    def __init__(self, backend: str, url: Optional[str] = None, maxsize: int = CLICK_QUEUE_SIZE,
+                 batch_size: int = CLICK_BATCH_SIZE, flush_interval: float = CLICK_FLUSH_INTERVAL,
+                 trending: Optional[TrendingTracker] = None):
+        self.backend = backend
+        self.trending = trending
+        self.url = url
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = None
+        self._process = None
+
+    def start(self):
+        """
+        이벤트를 처리하는 워커 프로세스를 시작합니다.
+        """
+        self._queue = self._context.Queue(self.maxsize)
+        self._process = self._context.Process(
+            target=_run_worker_process,
+            args=(self._queue, self.backend, self.url, self.batch_size, self.flush_interval),
+            name="click-pipeline",
+            daemon=True,
+        )
+        self._process.start()
+
+    async def enqueue(self, event: ClickEvent):
+        """
+        클릭 이벤트를 워커 프로세스의 큐에 넣습니다. 큐가 가득 차면 자리가 생길 때까지 대기합니다.
+
+        Raises:
+            RuntimeError: 파이프라인이 시작되지 않은 경우 발생합니다.
+        """
+        if self._queue is None:
+            raise RuntimeError("Click pipeline is not running")
+        if self.trending is not None:
+            self.trending.record(event.short_url)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            await asyncio.to_thread(self._queue.put, event)
+
+    async def stop(self):
+        """
+        큐에 남은 이벤트를 모두 반영하도록 워커 프로세스에 종료를 알리고 끝날 때까지 기다립니다.
+        """
+        if self._process is None:
+            return
+        await asyncio.to_thread(self._queue.put, None)
+        await asyncio.to_thread(self._process.join)
+        self._queue = None
+        self._process = None
+
+    def estimate_unique_visitors(self, short_url: str, stored: Optional[bytes]) -> int:
+        """
+        저장된 스케치로 고유 방문자 수를 추정합니다.
+        """
+        return HyperLogLog.from_bytes(stored).estimate()
+
+
+def _run_worker_process(event_queue, backend: str, url: Optional[str], batch_size: int, flush_interval: float):
+    asyncio.run(_consume_process_queue(event_queue, backend, url, batch_size, flush_interval))
+
+
+async def _consume_process_queue(event_queue, backend: str, url: Optional[str], batch_size: int, flush_interval: float):
+    storage = create_storage(backend, url)
+    await storage.initialize()
+    writer = ClickWriter(storage)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                event = await loop.run_in_executor(None, event_queue.get, True, flush_interval)
+            except queue.Empty:
+                await writer.write([])
+                continue
+            batch = [event]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(event_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            await writer.write([event for event in batch if event is not None], final=stopping)
+            if stopping:
+                break
+    finally:
+        await storage.close()
+
+
+def create_click_pipeline(storage, backend: str, trending: Optional[TrendingTracker] = None):
+    """
+    `CLICK_PIPELINE` 설정에 따라 클릭 이벤트 파이프라인을 생성합니다.
+
+    Args:
+        storage (StorageBackend): 이벤트 루프 내 워커가 사용할 저장소 백엔드입니다.
+        backend (str): 별도 프로세스 워커가 생성할 저장소 백엔드 이름입니다.
+        trending (Optional[TrendingTracker]): 클릭 이벤트로 갱신할 인기 URL 추적기입니다.
+
+    Returns:
+        ClickPipeline | ProcessClickPipeline: 생성된 파이프라인입니다.
+
+    Raises:
+        ValueError: 별도 프로세스와 상태를 공유할 수 없는 memory 백엔드에 process 모드를 설정한 경우 발생합니다.
+    """
+    if CLICK_PIPELINE == "process":
+        if backend == "memory":
+            raise ValueError("CLICK_PIPELINE=process is not supported with the memory storage backend")
+        return ProcessClickPipeline(backend, trending=trending)
+    return ClickPipeline(storage, trending=trending)
@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from . import crud, models, schemas
-from .database import get_db, engine
-from .utils import generate_short_url
+import asyncio
+import os
+import secrets
+import threading
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from . import schemas
+from .events import ClickEvent, create_click_pipeline
+from .profiling import SamplingProfiler, format_collapsed
+from .storage import STORAGE_BACKEND, StorageBackend, create_storage
+from .trending import TrendingSync, TrendingTracker, WINDOWS
+from .utils import generate_short_url, hash_visitor
 from fastapi.responses import RedirectResponse
 
 app = FastAPI(
@@ -14,21 +22,52 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# STORAGE_BACKEND 설정에 따라 선택된 저장소 백엔드입니다.
+storage = create_storage()
+# 최근 인기 단축 URL을 추적하는 스케치입니다. 클릭 이벤트 파이프라인이 갱신하고, 다른 워커의 스케치는
+# 저장소를 통해 주기적으로 합칩니다.
+trending = TrendingTracker()
+trending_sync = TrendingSync(storage, trending)
+# 조회 수 증가, 고유 방문자 스케치 저장과 인기 URL 집계는 리디렉션 응답 이후 백그라운드 워커가 처리합니다.
+click_pipeline = create_click_pipeline(storage, STORAGE_BACKEND, trending)
+# 관리자 엔드포인트 인증 토큰입니다. 설정하지 않으면 관리자 엔드포인트가 비활성화됩니다.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+profiler = SamplingProfiler()
+
+def get_storage() -> StorageBackend:
+    """
+    요청 핸들러에 저장소 백엔드를 주입하기 위한 의존성 함수입니다.
+    """
+    return storage
+
 @app.on_event("startup")
 async def startup_event():
     """
     애플리케이션 시작 시 호출되는 이벤트 핸들러입니다.
 
-    데이터베이스의 테이블을 생성하고, 만료된 URL을 삭제하는 백그라운드 작업을 수행합니다.
+    저장소를 열어 테이블을 생성하고, 만료된 URL을 삭제하는 백그라운드 작업을 수행한 뒤
+    클릭 이벤트 파이프라인과 워커 간 인기 URL 동기화를 시작합니다.
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
+    await storage.initialize()
     # 백그라운드 작업으로 만료된 URL 삭제
-    async with engine.connect() as conn:
-        await crud.delete_expired_urls(conn)
+    await storage.purge()
+    click_pipeline.start()
+    trending_sync.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    애플리케이션 종료 시 호출되는 이벤트 핸들러입니다.
+
+    인기 URL 동기화를 멈추고, 클릭 이벤트 파이프라인에 남은 이벤트와 고유 방문자 스케치를 저장한 뒤
+    저장소를 닫습니다.
+    """
+    await trending_sync.stop()
+    await click_pipeline.stop()
+    await storage.close()
 
 @app.post("/shorten", response_model=schemas.URL)
-async def create_short_url(url: schemas.URLCreate, db: AsyncSession = Depends(get_db)):
+async def create_short_url(url: schemas.URLCreate, storage: StorageBackend = Depends(get_storage)):
     """
     긴 URL을 단축 URL로 변환하여 데이터베이스에 저장합니다.
 
@@ -37,28 +76,30 @@ async def create_short_url(url: schemas.URLCreate, db: AsyncSession = Depends(ge
 
     Args:
         url (schemas.URLCreate): 생성할 URL의 정보입니다.
-        db (AsyncSession): 데이터베이스 세션입니다.
+        storage (StorageBackend): 저장소 백엔드입니다.
 
     Returns:
         schemas.URL: 생성된 URL의 정보입니다.
     """
     short_url = generate_short_url()
-    while await crud.get_url_by_short_url(db, short_url):
+    while await storage.resolve(short_url):
         short_url = generate_short_url()
-    db_url = await crud.create_url(db, url.url, short_url, url.expiration_date)
+    db_url = await storage.create(url.url, short_url, url.expiration_date)
     return db_url
 
 @app.get("/{short_url}", response_class=RedirectResponse)
-async def redirect_to_original_url(short_url: str, db: AsyncSession = Depends(get_db)):
+async def redirect_to_original_url(short_url: str, request: Request, storage: StorageBackend = Depends(get_storage)):
     """
     단축 URL을 원래의 긴 URL로 리디렉션합니다.
 
     요청된 단축 URL을 데이터베이스에서 조회하여, 해당 URL로 리디렉션합니다.
-    이 과정에서 URL의 조회 수를 증가시킵니다.
+    조회 수 증가와 고유 방문자 스케치 갱신은 클릭 이벤트로 큐에 넣고 바로 응답하며,
+    백그라운드 워커가 묶음 단위로 데이터베이스에 반영합니다.
 
     Args:
         short_url (str): 단축된 URL입니다.
-        db (AsyncSession): 데이터베이스 세션입니다.
+        request (Request): 클라이언트 정보를 얻기 위한 요청 객체입니다.
+        storage (StorageBackend): 저장소 백엔드입니다.
 
     Returns:
         RedirectResponse: 원래의 긴 URL로 리디렉션합니다.
@@ -66,33 +107,97 @@ async def redirect_to_original_url(short_url: str, db: AsyncSession = Depends(ge
     Raises:
         HTTPException: URL이 존재하지 않는 경우 404 오류를 반환합니다.
     """
-    db_url = await crud.get_url_by_short_url(db, short_url)
+    db_url = await storage.resolve(short_url)
     if db_url:
-        await crud.increment_view_count(db, short_url)  # 조회 수 증가
+        client_host = request.client.host if request.client else ""
+        visitor_hash = hash_visitor(client_host, request.headers.get("user-agent", ""))
+        await click_pipeline.enqueue(ClickEvent(short_url, visitor_hash))  # 조회 수 증가
         return RedirectResponse(url=db_url.url, status_code=301)
     else:
         raise HTTPException(status_code=404, detail="URL not found")
 
+@app.post("/admin/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(5, gt=0, le=60),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    이벤트 루프 스레드를 지정한 시간 동안 샘플링 프로파일링합니다.
+
+    샘플링은 별도 스레드에서 수행되며, 그동안 처리되는 다른 요청의 호출 스택이 집계됩니다.
+    결과는 flamegraph 도구에 바로 넣을 수 있는 collapsed stack 형식입니다.
+
+    Args:
+        seconds (float): 프로파일링할 시간(초)입니다.
+        x_admin_token (Optional[str]): `X-Admin-Token` 헤더로 전달된 관리자 토큰입니다.
+
+    Returns:
+        PlainTextResponse: 호출 스택별 샘플 수입니다.
+
+    Raises:
+        HTTPException: 관리자 토큰이 설정되지 않은 경우 404, 토큰이 일치하지 않는 경우 403,
+            이미 프로파일링이 실행 중인 경우 409 오류를 반환합니다.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    try:
+        stacks = await asyncio.to_thread(profiler.run, threading.get_ident(), seconds)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return format_collapsed(stacks)
+
+@app.get("/stats/top")
+async def get_top_urls(window: str = "5m", k: int = Query(10, ge=1, le=trending.capacity)):
+    """
+    최근 가장 많이 조회된 단축 URL 목록을 반환합니다.
+
+    클릭 이벤트 파이프라인이 갱신하는 시간 감쇠 Space-Saving 스케치를 조회하므로 데이터베이스에
+    접근하지 않습니다. 점수는 지정한 구간을 반감기로 감쇠한 조회 수입니다.
+
+    여러 워커로 실행하면 각 워커의 스케치는 `TrendingSync`가 저장소를 통해 주기적으로 합치므로,
+    다른 워커가 처리한 조회는 최대 `TRENDING_SYNC_INTERVAL`초 늦게 반영됩니다.
+
+    Args:
+        window (str): 집계 구간입니다. `1m`, `5m`, `15m`, `1h` 중 하나입니다.
+        k (int): 반환할 단축 URL 수입니다.
+
+    Returns:
+        dict: 집계 구간과 단축 URL별 점수 목록을 포함한 사전입니다.
+
+    Raises:
+        HTTPException: 지원하지 않는 집계 구간인 경우 400 오류를 반환합니다.
+    """
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unsupported window. Use one of: {', '.join(WINDOWS)}")
+    top = trending.top(window, k)
+    return {"window": window, "urls": [{"short_url": key, "score": score} for key, score in top]}
+
 @app.get("/stats/{short_url}")
-async def get_stats(short_url: str, db: AsyncSession = Depends(get_db)):
+async def get_stats(short_url: str, storage: StorageBackend = Depends(get_storage)):
     """
-    단축 URL의 조회 수를 반환합니다.
+    단축 URL의 조회 수와 추정 고유 방문자 수를 반환합니다.
 
     제공된 단축 URL의 조회 수를 데이터베이스에서 조회하여 반환합니다.
+    고유 방문자 수는 저장된 HyperLogLog 스케치와 아직 저장되지 않은 스케치를 합쳐 추정합니다.
 
     Args:
         short_url (str): 조회 수를 가져올 단축 URL입니다.
-        db (AsyncSession): 데이터베이스 세션입니다.
+        storage (StorageBackend): 저장소 백엔드입니다.
 
     Returns:
-        dict: 단축 URL과 조회 수를 포함한 사전입니다.
+        dict: 단축 URL, 조회 수, 추정 고유 방문자 수를 포함한 사전입니다.
 
     Raises:
         HTTPException: URL이 존재하지 않는 경우 404 오류를 반환합니다.
     """
-    view_count = await crud.get_view_count(db, short_url)
-    if view_count is not None:
-        return {"short_url": short_url, "view_count": view_count}
+    stats = await storage.stats(short_url)
+    if stats is not None:
+        unique_visitors = click_pipeline.estimate_unique_visitors(short_url, stats.visitor_sketch)
+        return {"short_url": short_url, "view_count": stats.view_count, "unique_visitors": unique_visitors}
     else:
         raise HTTPException(status_code=404, detail="URL not found")
 
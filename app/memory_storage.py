@@ -0,0 +1,416 @@
+import asyncio
+import base64
+import fcntl
+import gc
+import glob
+import json
+import os
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .hll import HyperLogLog
+from .packed_index import PackedIndex, Row
+from .storage import URLRecord, URLStats
+
+_SNAPSHOT = "snapshot.tsv"
+_LOCK = "LOCK"
+_LOG_PATTERN = "log.*.jsonl"
+
+# (id, url, expiration_date, view_count) 형태의 불변 항목입니다.
+# 갱신할 때마다 새 튜플로 교체하므로 사전을 얕은 복사하는 것만으로 일관된 스냅샷을 얻을 수 있습니다.
+Entry = Tuple[int, str, Optional[datetime], int]
+
+
+def _encode_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _decode_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _encode_bytes(value: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(value).decode() if value is not None else None
+
+
+def _decode_bytes(value: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(value) if value is not None else None
+
+
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+_NEEDS_ESCAPE = re.compile(r"[\\\t\n\r]")
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _escape(value: str) -> str:
+    # 스냅샷은 탭으로 구분하므로 URL에 포함된 탭, 줄바꿈(\n, \r), 역슬래시만 이스케이프합니다.
+    if _NEEDS_ESCAPE.search(value) is None:
+        return value
+    return _NEEDS_ESCAPE.sub(lambda match: _ESCAPES[match.group()], value)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return _ESCAPED.sub(lambda match: _UNESCAPES[match.group(1)], value)
+
+
+class MemoryStorage:
+    """
+    모든 매핑을 메모리에 두고 추가 전용 로그로 영속성을 보장하는 저장소 백엔드입니다.
+
+    조회는 메모리의 사전만 사용하므로 데이터베이스를 거치지 않습니다. 쓰기는 메모리에 반영한 뒤
+    로그 레코드를 버퍼에 추가하고, `commit_delay` 동안 모인 레코드를 한 번의 write와 fsync로
+    기록하는 그룹 커밋이 끝난 후에 반환됩니다.
+
+    로그는 세대 번호가 붙은 파일(`log.<세대>.jsonl`)에 기록되며, 레코드가 `snapshot_every`개
+    쌓이면 새 세대로 로그를 교체하고 그 시점의 상태를 압축된 스냅샷으로 저장한 뒤 이전 로그를
+    삭제합니다. 재시작 시에는 스냅샷을 읽고 스냅샷 세대 이후의 로그만 재생합니다.
+
+    스냅샷에 포함된 항목은 `PackedIndex`에 배열로 보관하여 링크당 메모리를 줄이고, 이후 생성된
+    항목만 사전(`_entries`)에 둡니다. 스냅샷을 만들 때 두 계층을 새 `PackedIndex`로 합치며,
+    합치는 동안 반영된 레코드는 교체 직후 다시 적용합니다. 합치는 동안에는 새 인덱스 크기만큼의
+    메모리가 추가로 필요합니다. 압축된 항목의 만료 시각은 초 단위로 보관됩니다. 고유 방문자
+    스케치는 방문 기록이 있는 링크마다 2KB씩 `_sketches` 사전에 따로 보관됩니다.
+
+    한 디렉터리는 하나의 프로세스만 열 수 있으며, 다른 프로세스가 사용 중인 디렉터리로
+    `initialize`를 호출하면 실패합니다. 여러 워커 프로세스로 실행할 때는 사용할 수 없습니다.
+
+    Attributes:
+        directory (str): 스냅샷과 로그를 저장할 디렉터리입니다.
+        commit_delay (float): 그룹 커밋으로 레코드를 모으는 시간(초)입니다.
+        snapshot_every (int): 스냅샷을 만들 로그 레코드 수입니다.
+    """
+
+    def __init__(self, directory: str, commit_delay: float = 0.002, snapshot_every: int = 100_000):
+        self.directory = directory
+        self.commit_delay = commit_delay
+        self.snapshot_every = snapshot_every
+        self._index = PackedIndex()
+        self._entries: Dict[str, Entry] = {}
+        self._sketches: Dict[str, bytes] = {}
+        # 인기 URL 스냅샷입니다. 단일 프로세스 전용이므로 공유할 워커가 없어 로그에 기록하지 않습니다.
+        self._trending: Dict[str, Tuple[bytes, datetime]] = {}
+        # 스냅샷으로 계층을 합치는 동안 반영된 레코드입니다. 합친 결과로 교체한 뒤 다시 적용합니다.
+        self._replay: Optional[List[dict]] = None
+        self._next_id = 1
+        self._generation = 0
+        self._log = None
+        self._lock_file = None
+        self._buffer: List[str] = []
+        self._commit_future: Optional[asyncio.Future] = None
+        self._commit_handle: Optional[asyncio.TimerHandle] = None
+        self._records_since_snapshot = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # 로그 쓰기는 하나의 스레드에서 순서대로 처리하고, 스냅샷은 별도 스레드에서 기록합니다.
+        self._log_executor: Optional[ThreadPoolExecutor] = None
+        self._snapshot_executor: Optional[ThreadPoolExecutor] = None
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._entries)
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"log.{generation}.jsonl")
+
+    async def initialize(self):
+        """
+        디렉터리를 잠그고 스냅샷과 로그로 상태를 복구합니다.
+
+        Raises:
+            RuntimeError: 다른 프로세스가 같은 디렉터리를 사용 중인 경우 발생합니다.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, _LOCK), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"Memory storage directory is in use by another process: {self.directory}")
+        self._log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-log")
+        self._snapshot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-snapshot")
+        loop = asyncio.get_running_loop()
+        replayed = await loop.run_in_executor(self._log_executor, self._recover)
+        if replayed:
+            # 재생한 로그를 스냅샷으로 합쳐 다음 재시작을 빠르게 합니다.
+            await self.snapshot()
+
+    def _recover(self) -> int:
+        snapshot_path = os.path.join(self.directory, _SNAPSHOT)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8", newline="\n") as f:
+                header = json.loads(f.readline())
+                self._generation = header["generation"]
+                self._next_id = header["next_id"]
+                # 스냅샷은 코드 순서로 기록되므로 한 줄씩 읽어 배열에 바로 이어 씁니다.
+                # 스케치 사전을 채우는 동안 순환 참조 검사가 반복되지 않도록 GC를 멈춥니다.
+                gc.disable()
+                try:
+                    self._index, leftovers = PackedIndex.from_sorted(
+                        self._read_snapshot_rows(f), header.get("packed"), header.get("arena")
+                    )
+                finally:
+                    gc.enable()
+            self._entries = {row[0]: row[1:] for row in leftovers}
+        replayed = 0
+        generations = sorted(
+            int(os.path.basename(path).split(".")[1])
+            for path in glob.glob(os.path.join(self.directory, _LOG_PATTERN))
+        )
+        for generation in generations:
+            if generation < self._generation:
+                continue
+            with open(self._log_path(generation), "r+b") as f:
+                valid = 0
+                for line in f:
+                    try:
+                        record = json.loads(line) if line.endswith(b"\n") else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        # 마지막 그룹 커밋 도중 중단되어 잘린 레코드는 버리고, 이후 레코드가 그 뒤에
+                        # 이어 붙어 함께 읽히지 않도록 마지막 정상 레코드 위치에서 로그를 잘라냅니다.
+                        f.truncate(valid)
+                        os.fsync(f.fileno())
+                        break
+                    self._apply(record)
+                    valid += len(line)
+                    replayed += 1
+            self._generation = max(self._generation, generation)
+        self._log = open(self._log_path(self._generation), "a", encoding="utf-8")
+        return replayed
+
+    def _read_snapshot_rows(self, f) -> Iterator[Row]:
+        sketches = self._sketches
+        for line in f:
+            short_url, id, url, expiration_date, view_count, sketch = line.rstrip("\n").split("\t")
+            short_url = _unescape(short_url)
+            if sketch:
+                sketches[short_url] = base64.b64decode(sketch)
+            yield (
+                short_url,
+                int(id),
+                _unescape(url),
+                datetime.fromisoformat(expiration_date) if expiration_date else None,
+                int(view_count),
+            )
+
+    def _lookup(self, short_url: str) -> Optional[Entry]:
+        entry = self._entries.get(short_url)
+        if entry is not None:
+            return entry
+        index = self._index
+        position = index.find(short_url)
+        if position < 0:
+            return None
+        return index.ids[position], index.url(position), index.expiration_date(position), index.view_counts[position]
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        entries, index = self._entries, self._index
+        if op == "create":
+            short_url = record["short_url"]
+            position = index.find(short_url)
+            if position >= 0:
+                index.delete(position)
+            entries[short_url] = (record["id"], record["url"], _decode_datetime(record["expiration_date"]), 0)
+            self._sketches.pop(short_url, None)
+            self._next_id = max(self._next_id, record["id"] + 1)
+        elif op == "increment":
+            for short_url, count in record["counts"].items():
+                entry = entries.get(short_url)
+                if entry is not None:
+                    entries[short_url] = (entry[0], entry[1], entry[2], entry[3] + count)
+                    continue
+                position = index.find(short_url)
+                if position >= 0:
+                    index.view_counts[position] += count
+        elif op == "sketch":
+            for short_url, sketch in record["sketches"].items():
+                if short_url in entries or index.find(short_url) >= 0:
+                    self._sketches[short_url] = _decode_bytes(sketch)
+        elif op == "purge":
+            now = _decode_datetime(record["now"])
+            purged = [key for key, entry in entries.items() if entry[2] is not None and entry[2] < now]
+            for short_url in purged:
+                del entries[short_url]
+            for short_url in chain(purged, index.purge(now)):
+                self._sketches.pop(short_url, None)
+
+    async def _append(self, record: dict):
+        # 메모리에 먼저 반영한 뒤 로그에 기록하고, 그룹 커밋의 fsync가 끝나면 반환합니다.
+        self._apply(record)
+        if self._replay is not None:
+            self._replay.append(record)
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+        if self._commit_future is None:
+            loop = asyncio.get_running_loop()
+            self._commit_future = loop.create_future()
+            self._commit_handle = loop.call_later(self.commit_delay, self._submit_buffer)
+        future = self._commit_future
+        self._records_since_snapshot += 1
+        if self._records_since_snapshot >= self.snapshot_every and self._snapshot_task is None:
+            self._snapshot_task = asyncio.ensure_future(self.snapshot())
+        await asyncio.shield(future)
+
+    def _submit_buffer(self):
+        if self._commit_future is None:
+            return
+        self._commit_handle.cancel()
+        data, future = "".join(self._buffer), self._commit_future
+        self._buffer, self._commit_future, self._commit_handle = [], None, None
+        written = asyncio.get_running_loop().run_in_executor(self._log_executor, self._write_log, data)
+
+        def done(result):
+            if result.exception() is not None:
+                future.set_exception(result.exception())
+            else:
+                future.set_result(None)
+
+        written.add_done_callback(done)
+
+    def _write_log(self, data: str):
+        self._log.write(data)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _rotate_log(self, generation: int):
+        self._log.close()
+        self._log = open(self._log_path(generation), "a", encoding="utf-8")
+
+    async def snapshot(self):
+        """
+        현재 상태를 스냅샷으로 저장하고 스냅샷에 포함된 로그를 삭제합니다.
+
+        버퍼에 남은 레코드를 현재 세대 로그로 보낸 뒤 같은 시점의 상태를 복사하고 새 세대 로그로
+        교체하므로, 스냅샷 이후의 쓰기는 모두 새 세대 로그에만 기록됩니다. 복사한 상태는 스냅샷
+        스레드에서 새 `PackedIndex`로 합친 뒤 현재 상태와 교체합니다.
+        """
+        loop = asyncio.get_running_loop()
+        self._submit_buffer()
+        index, entries, sketches, next_id = self._index, dict(self._entries), dict(self._sketches), self._next_id
+        # 조회 수 증가와 삭제 표시는 배열을 제자리에서 바꾸므로 이 시점의 값을 복사해 둡니다.
+        ids, view_counts = index.ids[:], index.view_counts[:]
+        self._generation += 1
+        generation = self._generation
+        self._records_since_snapshot = 0
+        self._replay = []
+        try:
+            await loop.run_in_executor(self._log_executor, self._rotate_log, generation)
+            compacted, leftovers = await loop.run_in_executor(
+                self._snapshot_executor, self._write_snapshot,
+                index, ids, view_counts, entries, sketches, next_id, generation,
+            )
+        except BaseException:
+            self._replay = None
+            raise
+        finally:
+            self._snapshot_task = None
+        replay, self._replay = self._replay, None
+        self._index, self._entries, self._sketches = compacted, {row[0]: row[1:] for row in leftovers}, sketches
+        for record in replay:
+            self._apply(record)
+
+    def _write_snapshot(self, index: PackedIndex, ids: array, view_counts: array, entries: Dict[str, Entry],
+                        sketches: Dict[str, bytes], next_id: int, generation: int) -> Tuple[PackedIndex, List[Row]]:
+        compacted, leftovers = index.merge(((key,) + entry for key, entry in entries.items()), ids, view_counts)
+        path = os.path.join(self.directory, _SNAPSHOT)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            # 재시작 시 배열을 정확한 크기로 미리 할당할 수 있도록 압축 항목 수와 URL 크기를 기록합니다.
+            f.write(json.dumps({
+                "generation": generation,
+                "next_id": next_id,
+                "packed": len(compacted),
+                "arena": len(compacted.arena),
+            }) + "\n")
+            for short_url, id, url, expiration_date, view_count in chain(compacted.rows(), leftovers):
+                f.write(
+                    f"{_escape(short_url)}\t{id}\t{_escape(url)}\t"
+                    f"{expiration_date.isoformat() if expiration_date is not None else ''}\t{view_count}\t"
+                    f"{_encode_bytes(sketches.get(short_url)) or ''}\n"
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        for log_path in glob.glob(os.path.join(self.directory, _LOG_PATTERN)):
+            if int(os.path.basename(log_path).split(".")[1]) < generation:
+                os.remove(log_path)
+        return compacted, leftovers
+
+    async def close(self):
+        if self._log_executor is None:
+            return
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        await self.snapshot()
+        self._log.close()
+        self._log_executor.shutdown(wait=True)
+        self._snapshot_executor.shutdown(wait=True)
+        self._log_executor = None
+        self._snapshot_executor = None
+        self._lock_file.close()
+        self._lock_file = None
+
+    async def create(self, url: str, short_url: str, expiration_date: Optional[datetime]) -> URLRecord:
+        if expiration_date is not None and expiration_date.tzinfo is not None:
+            expiration_date = expiration_date.replace(tzinfo=None)
+        id = self._next_id
+        self._next_id += 1
+        await self._append({
+            "op": "create",
+            "id": id,
+            "url": url,
+            "short_url": short_url,
+            "expiration_date": _encode_datetime(expiration_date),
+        })
+        return URLRecord(id, url, short_url, expiration_date, 0)
+
+    async def resolve(self, short_url: str) -> Optional[URLRecord]:
+        entry = self._lookup(short_url)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= datetime.utcnow():
+            return None
+        return URLRecord(entry[0], entry[1], short_url, entry[2], entry[3])
+
+    async def increment(self, counts: Dict[str, int]):
+        if counts:
+            await self._append({"op": "increment", "counts": counts})
+
+    async def merge_visitor_sketches(self, sketches: Dict[str, HyperLogLog]):
+        merged = {}
+        for short_url, pending in sketches.items():
+            if self._lookup(short_url) is None:
+                continue
+            sketch = HyperLogLog.from_bytes(self._sketches.get(short_url))
+            sketch.merge(pending)
+            merged[short_url] = _encode_bytes(sketch.to_bytes())
+        if merged:
+            await self._append({"op": "sketch", "sketches": merged})
+
+    async def stats(self, short_url: str) -> Optional[URLStats]:
+        entry = self._lookup(short_url)
+        if entry is None:
+            return None
+        return URLStats(entry[3], self._sketches.get(short_url))
+
+    async def purge(self):
+        await self._append({"op": "purge", "now": _encode_datetime(datetime.utcnow())})
+
+    async def save_trending(self, worker_id: str, snapshot: bytes, stale_before: datetime):
+        self._trending[worker_id] = (snapshot, datetime.utcnow())
+        self._trending = {key: value for key, value in self._trending.items() if value[1] >= stale_before}
+
+    async def load_trending(self) -> Dict[str, bytes]:
+        return {worker_id: snapshot for worker_id, (snapshot, _) in self._trending.items()}
@@ -1,17 +1,34 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, LargeBinary, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import expression
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import pytz
 from datetime import datetime
 
 Base = declarative_base()
 
+class URLPrefix(Base):
+    __tablename__ = 'url_prefixes'
+
+    id = Column(Integer, primary_key=True)
+    prefix = Column(String, unique=True, nullable=False)  # 여러 URL이 공유하는 scheme, 호스트, 경로 접두사
+
 class URL(Base):
     __tablename__ = 'urls'
 
     id = Column(Integer, primary_key=True, index=True)
-    url = Column(String, nullable=False)
+    url = Column(String, nullable=True)  # 접두사로 압축된 항목은 비워 두고 prefix_id와 url_suffix로 저장
     short_url = Column(String, unique=True, index=True, nullable=False)
     expiration_date = Column(DateTime, nullable=True)
     view_count = Column(Integer, default=0)  # 조회 수를 저장할 필드 추가
+    # 고유 방문자 수 추정을 위한 HyperLogLog 스케치. 리디렉션 조회마다 2KB를 읽지 않도록 지연 로딩합니다.
+    visitor_sketch = deferred(Column(LargeBinary, nullable=True))
+    prefix_id = Column(Integer, ForeignKey('url_prefixes.id'), nullable=True)
+    url_suffix = Column(String, nullable=True)
+
+class TrendingSnapshot(Base):
+    __tablename__ = 'trending_snapshots'
+
+    worker_id = Column(String, primary_key=True)  # 스냅샷을 기록한 워커 프로세스 (호스트:PID)
+    snapshot = Column(LargeBinary, nullable=False)  # TrendingTracker.to_bytes()로 직렬화한 인기 URL 카운터
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,363 @@
+import string
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# generate_short_url이 만드는 6자리 코드의 문자 집합입니다. 62^6 < 2^63 이므로 64비트 정수 하나에 담깁니다.
+ALPHABET = string.digits + string.ascii_lowercase + string.ascii_uppercase
+CODE_LENGTH = 6
+_VALUES = {char: value for value, char in enumerate(ALPHABET)}
+_BASE = len(ALPHABET)
+_EPOCH = datetime(1970, 1, 1)
+# 만료 시각은 부호 없는 32비트 epoch 초로 저장하며, 0은 만료 없음을 뜻합니다.
+_NO_EXPIRATION = 0
+_MAX_EXPIRATION = 2 ** 32 - 1
+
+# (short_url, id, url, expiration_date, view_count)
+Row = Tuple[str, int, str, Optional[datetime], int]
+
+
+def encode_code(code: str) -> Optional[int]:
+    """
+    6자리 base62 단축 코드를 64비트 정수로 변환합니다.
+
+    Args:
+        code (str): 단축 URL 코드입니다.
+
+    Returns:
+        Optional[int]: 변환된 정수입니다. 길이가 다르거나 base62 문자가 아니면 None을 반환합니다.
+    """
+    if len(code) != CODE_LENGTH:
+        return None
+    value = 0
+    for char in code:
+        digit = _VALUES.get(char)
+        if digit is None:
+            return None
+        value = value * _BASE + digit
+    return value
+
+
+def decode_code(value: int) -> str:
+    """
+    `encode_code`로 변환한 정수를 다시 단축 코드로 변환합니다.
+    """
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, _BASE)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _encode_expiration(expiration_date: Optional[datetime]) -> int:
+    if expiration_date is None:
+        return _NO_EXPIRATION
+    seconds = int((expiration_date - _EPOCH).total_seconds())
+    return min(max(seconds, 1), _MAX_EXPIRATION)
+
+
+def _decode_expiration(seconds: int) -> Optional[datetime]:
+    if seconds == _NO_EXPIRATION:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+
+def _positions(values: array, value: int, start: int, stop: int) -> Iterator[int]:
+    # array.index로 [start, stop) 구간에서 value가 있는 위치를 차례로 찾습니다.
+    while start < stop:
+        try:
+            position = values.index(value, start, stop)
+        except ValueError:
+            return
+        yield position
+        start = position + 1
+
+
+class PackedIndex:
+    """
+    수천만 개의 단축 URL 매핑을 적은 메모리로 보관하기 위한 정렬된 배열 기반 인덱스입니다.
+
+    단축 코드는 64비트 정수로 바꿔 정렬된 배열에 저장하고 이진 탐색으로 O(log n)에 찾습니다.
+    원본 URL은 하나의 연속된 바이트 영역(arena)에 UTF-8로 이어 붙이고 시작 위치만 배열로
+    보관하며, 만료 시각은 32비트 epoch 초로 저장합니다. 파이썬 객체를 항목마다 만들지 않으므로
+    항목당 고정 비용은 36바이트에 URL 길이를 더한 만큼입니다.
+
+    구조는 `build`, `from_sorted`, `merge`로 새로 만들며 이후에는 조회 수 증가와 삭제 표시만
+    제자리에서 수행합니다. 새 항목은 호출하는 쪽에서 별도로 보관했다가 `merge`로 합칩니다.
+    `from_sorted`와 `merge`는 정렬된 배열을 순서대로 이어 쓰므로 항목마다 파이썬 객체를 만들지
+    않으며, 합치는 동안 추가로 필요한 메모리는 새 인덱스의 크기 정도입니다. 만료 시각은 초
+    단위로 저장됩니다.
+
+    Attributes:
+        keys (array): 정렬된 단축 코드 정수 배열입니다.
+        ids (array): 항목 id 배열입니다. 0은 삭제된 항목을 뜻합니다.
+        view_counts (array): 조회 수 배열입니다.
+        expirations (array): 만료 시각(epoch 초) 배열입니다.
+        offsets (array): arena 내 URL 시작 위치 배열이며, 길이는 항목 수 + 1입니다.
+        arena (bytearray): URL을 이어 붙인 바이트 영역입니다.
+        deleted (int): 삭제 표시된 항목 수입니다.
+    """
+
+    __slots__ = ("keys", "ids", "view_counts", "expirations", "offsets", "arena", "deleted")
+
+    def __init__(self):
+        self.keys = array("q")
+        self.ids = array("q")
+        self.view_counts = array("q")
+        self.expirations = array("I")
+        self.offsets = array("Q", [0])
+        self.arena = bytearray()
+        self.deleted = 0
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.deleted
+
+    @classmethod
+    def build(cls, rows: Iterable[Row]) -> Tuple["PackedIndex", List[Row]]:
+        """
+        정렬되지 않은 항목 목록으로 인덱스를 만듭니다. 항목을 모두 모아 정렬하므로 큰 입력에는
+        `from_sorted`를 사용합니다.
+
+        Args:
+            rows (Iterable[Row]): (short_url, id, url, expiration_date, view_count) 목록입니다.
+
+        Returns:
+            Tuple[PackedIndex, List[Row]]: 생성된 인덱스와, 6자리 base62 코드가 아니어서 담지 못한 항목입니다.
+        """
+        return cls().merge(rows)
+
+    @classmethod
+    def from_sorted(cls, rows: Iterable[Row], count: Optional[int] = None,
+                    arena_size: Optional[int] = None) -> Tuple["PackedIndex", List[Row]]:
+        """
+        코드 순서로 정렬된 항목을 하나씩 읽어 인덱스를 만듭니다.
+
+        스냅샷처럼 이미 정렬된 입력을 미리 할당한 배열에 바로 채우며, 순서가 어긋나거나 할당한
+        크기를 넘는 항목만 따로 모아 마지막에 `merge`로 합칩니다.
+
+        Args:
+            rows (Iterable[Row]): 정렬된 (short_url, id, url, expiration_date, view_count) 항목입니다.
+            count (Optional[int]): 압축할 항목 수입니다. 생략하면 `build`로 만듭니다.
+            arena_size (Optional[int]): 압축할 항목의 URL 바이트 수 합계입니다.
+
+        Returns:
+            Tuple[PackedIndex, List[Row]]: 생성된 인덱스와, 6자리 base62 코드가 아니어서 담지 못한 항목입니다.
+        """
+        if count is None or arena_size is None:
+            return cls.build(rows)
+        writer = _PackedWriter(count, arena_size)
+        unordered, leftovers = [], []
+        last = -1
+        for row in rows:
+            key = encode_code(row[0])
+            if key is None:
+                leftovers.append(row)
+                continue
+            url = row[2].encode()
+            if key > last and writer.fits(len(url)):
+                writer.append(key, row, url)
+                last = key
+            else:
+                unordered.append(row)
+        index = writer.finish()
+        if unordered:
+            index, _ = index.merge(unordered)
+        return index, leftovers
+
+    def merge(self, rows: Iterable[Row], ids: Optional[array] = None,
+              view_counts: Optional[array] = None) -> Tuple["PackedIndex", List[Row]]:
+        """
+        현재 인덱스와 새 항목을 합친 새 인덱스를 만듭니다. 현재 인덱스는 바뀌지 않습니다.
+
+        새 항목만 정렬한 뒤 기존 배열과 선형으로 병합합니다. 결과 크기를 먼저 계산하여 배열을 한
+        번만 할당하고, 기존 항목은 삭제 표시 사이의 구간 단위로 배열과 arena를 그대로 복사합니다.
+        같은 코드가 있으면 새 항목이 우선합니다.
+
+        Args:
+            rows (Iterable[Row]): 추가할 (short_url, id, url, expiration_date, view_count) 항목입니다.
+            ids (Optional[array]): 사용할 id 배열의 복사본입니다. 생략하면 현재 배열을 사용합니다.
+            view_counts (Optional[array]): 사용할 조회 수 배열의 복사본입니다.
+
+        Returns:
+            Tuple[PackedIndex, List[Row]]: 생성된 인덱스와, 6자리 base62 코드가 아니어서 담지 못한 항목입니다.
+        """
+        ids = self.ids if ids is None else ids
+        view_counts = self.view_counts if view_counts is None else view_counts
+        keys, offsets, size = self.keys, self.offsets, len(self.keys)
+        additions, leftovers = [], []
+        for row in rows:
+            key = encode_code(row[0])
+            if key is None:
+                leftovers.append(row)
+            else:
+                additions.append((key, row, row[2].encode()))
+        additions.sort(key=itemgetter(0))
+
+        # 삭제 표시된 항목과 새 항목으로 대체되는 항목을 빼서 결과 크기를 계산합니다.
+        skipped = set(_positions(ids, 0, 0, size))
+        for key, _, _ in additions:
+            position = bisect_left(keys, key)
+            if position < size and keys[position] == key:
+                skipped.add(position)
+        count = size - len(skipped) + len(additions)
+        arena_size = len(self.arena) + sum(len(url) for _, _, url in additions) - sum(
+            offsets[position + 1] - offsets[position] for position in skipped
+        )
+
+        writer = _PackedWriter(count, arena_size)
+        position = 0
+        for key, row, url in additions:
+            stop = bisect_left(keys, key, position)
+            writer.copy_live(self, ids, view_counts, position, stop)
+            position = stop
+            if position < size and keys[position] == key:
+                position += 1
+            writer.append(key, row, url)
+        writer.copy_live(self, ids, view_counts, position, size)
+        return writer.finish(), leftovers
+
+    def find(self, short_url: str) -> int:
+        """
+        단축 코드의 위치를 찾습니다.
+
+        Returns:
+            int: 항목 위치입니다. 없거나 삭제된 항목이면 -1을 반환합니다.
+        """
+        key = encode_code(short_url)
+        if key is None:
+            return -1
+        position = bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key or self.ids[position] == 0:
+            return -1
+        return position
+
+    def url(self, position: int) -> str:
+        return self.arena[self.offsets[position]:self.offsets[position + 1]].decode()
+
+    def expiration_date(self, position: int) -> Optional[datetime]:
+        return _decode_expiration(self.expirations[position])
+
+    def delete(self, position: int):
+        """
+        항목을 삭제된 것으로 표시합니다. 공간은 다음 `merge` 때 회수됩니다.
+        """
+        if self.ids[position] != 0:
+            self.ids[position] = 0
+            self.deleted += 1
+
+    def purge(self, now: datetime) -> List[str]:
+        """
+        `now` 이전에 만료된 항목을 삭제 표시합니다.
+
+        Returns:
+            List[str]: 삭제된 단축 코드 목록입니다.
+        """
+        cutoff = _encode_expiration(now)
+        ids, keys = self.ids, self.keys
+        purged = []
+        for position, expiration in enumerate(self.expirations):
+            if expiration != _NO_EXPIRATION and expiration < cutoff and ids[position] != 0:
+                self.delete(position)
+                purged.append(decode_code(keys[position]))
+        return purged
+
+    def rows(self, ids: Optional[array] = None, view_counts: Optional[array] = None) -> Iterator[Row]:
+        """
+        삭제되지 않은 항목을 순서대로 반환합니다.
+
+        Args:
+            ids (Optional[array]): 사용할 id 배열의 복사본입니다. 생략하면 현재 배열을 사용합니다.
+            view_counts (Optional[array]): 사용할 조회 수 배열의 복사본입니다.
+        """
+        ids = self.ids if ids is None else ids
+        view_counts = self.view_counts if view_counts is None else view_counts
+        offsets, arena, expirations = self.offsets, self.arena, self.expirations
+        for position, key in enumerate(self.keys):
+            if ids[position] == 0:
+                continue
+            yield (
+                decode_code(key),
+                ids[position],
+                arena[offsets[position]:offsets[position + 1]].decode(),
+                _decode_expiration(expirations[position]),
+                view_counts[position],
+            )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        배열과 arena가 차지하는 바이트 수입니다.
+        """
+        arrays = (self.keys, self.ids, self.view_counts, self.expirations, self.offsets)
+        return sum(len(values) * values.itemsize for values in arrays) + len(self.arena)
+
+
+class _PackedWriter:
+    """
+    미리 할당한 배열에 항목을 순서대로 채워 `PackedIndex`를 만듭니다.
+
+    배열을 필요한 크기로 한 번만 할당하므로 append로 늘릴 때의 여유 공간이 남지 않습니다.
+    """
+
+    def __init__(self, count: int, arena_size: int):
+        index = self.index = PackedIndex()
+        index.keys = array("q", [0]) * count
+        index.ids = array("q", [0]) * count
+        index.view_counts = array("q", [0]) * count
+        index.expirations = array("I", [0]) * count
+        index.offsets = array("Q", [0]) * (count + 1)
+        index.arena = bytearray(arena_size)
+        self.position = 0
+        self.arena_position = 0
+
+    def fits(self, url_size: int) -> bool:
+        return self.position < len(self.index.keys) and self.arena_position + url_size <= len(self.index.arena)
+
+    def append(self, key: int, row: Row, url: bytes):
+        index, position = self.index, self.position
+        index.keys[position] = key
+        index.ids[position] = row[1]
+        index.view_counts[position] = row[4]
+        index.expirations[position] = _encode_expiration(row[3])
+        end = self.arena_position + len(url)
+        index.arena[self.arena_position:end] = url
+        index.offsets[position + 1] = end
+        self.position, self.arena_position = position + 1, end
+
+    def copy_live(self, source: PackedIndex, ids: array, view_counts: array, start: int, stop: int):
+        # 삭제 표시(id 0)를 건너뛰며 [start, stop) 구간의 항목을 구간 단위로 복사합니다.
+        index = self.index
+        for end in chain(_positions(ids, 0, start, stop), (stop,)):
+            if start < end:
+                target = self.position
+                target_end = target + end - start
+                for values, source_values in (
+                    (index.keys, source.keys),
+                    (index.ids, ids),
+                    (index.view_counts, view_counts),
+                    (index.expirations, source.expirations),
+                ):
+                    memoryview(values)[target:target_end] = memoryview(source_values)[start:end]
+                first, last = source.offsets[start], source.offsets[end]
+                shift = self.arena_position - first
+                offsets = index.offsets
+                for position, offset in enumerate(memoryview(source.offsets)[start + 1:end + 1], target + 1):
+                    offsets[position] = offset + shift
+                arena_end = self.arena_position + last - first
+                # bytearray 슬라이스 대입은 원본을 임시 bytearray로 복사하므로 memoryview끼리 복사합니다.
+                memoryview(index.arena)[self.arena_position:arena_end] = memoryview(source.arena)[first:last]
+                self.position, self.arena_position = target_end, arena_end
+            start = end + 1
+
+    def finish(self) -> PackedIndex:
+        index = self.index
+        if self.position < len(index.keys):
+            # 예상보다 적게 채워진 경우 남은 공간을 잘라냅니다.
+            for values in (index.keys, index.ids, index.view_counts, index.expirations):
+                del values[self.position:]
+            del index.offsets[self.position + 1:]
+        del index.arena[self.arena_position:]
+        return index
@@ -0,0 +1,159 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import greenlet
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    SQL 문에서 리터럴과 바인딩 자리 표시자를 `?`로 바꾸고 공백을 정리합니다.
+
+    같은 형태의 쿼리가 값에 관계없이 하나로 묶이도록 하기 위해 사용합니다.
+
+    Args:
+        statement (str): 실행된 SQL 문입니다.
+
+    Returns:
+        str: 정규화된 SQL 문입니다.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _find_caller(module: str = "app.crud") -> Optional[str]:
+    # 비동기 엔진은 동기 코드를 별도 greenlet에서 실행하므로, 현재 스택에서 찾지 못하면
+    # 이벤트 루프 쪽 greenlet의 스택에서 crud 함수를 찾습니다.
+    frames = [sys._getframe(1)]
+    parent = greenlet.getcurrent().parent
+    if parent is not None and parent.gr_frame is not None:
+        frames.append(parent.gr_frame)
+    for frame in frames:
+        while frame is not None:
+            if frame.f_globals.get("__name__") == module:
+                return frame.f_code.co_name
+            frame = frame.f_back
+    return None
+
+
+def _count_parameters(parameters, executemany: bool) -> int:
+    if executemany:
+        return sum(len(params) for params in parameters)
+    return len(parameters) if parameters else 0
+
+
+def install_slow_query_log(engine, threshold_ms: float):
+    """
+    기준 시간보다 오래 걸린 SQL 문을 기록하는 엔진 이벤트 리스너를 등록합니다.
+
+    로그에는 실행 시간, 정규화된 SQL 문, 바인딩 파라미터 수, executemany 묶음 수, 쿼리를 호출한
+    crud 함수 이름이 포함됩니다. 리스너는 이 함수를 호출한 경우에만 등록되므로 비활성화 상태에서는
+    추가 비용이 없습니다.
+
+    Args:
+        engine (AsyncEngine): 리스너를 등록할 비동기 엔진입니다.
+        threshold_ms (float): 느린 쿼리로 판단할 기준 시간(밀리초)입니다.
+    """
+    sync_engine = engine.sync_engine
+    threshold = threshold_ms / 1000
+
+    # 시작 시각은 SQL 문마다 새로 만들어지는 실행 컨텍스트에 저장합니다. 실패한 SQL 문은
+    # after_cursor_execute가 호출되지 않으므로 연결에 저장하면 값이 계속 쌓입니다.
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_start
+        if elapsed < threshold:
+            return
+        slow_query_logger.warning(
+            "slow query %.1fms caller=%s params=%d batches=%d: %s",
+            elapsed * 1000,
+            _find_caller() or "-",
+            _count_parameters(parameters, executemany),
+            len(parameters) if executemany else 1,
+            normalize_statement(statement),
+        )
+
+
+class SamplingProfiler:
+    """
+    지정한 스레드의 호출 스택을 주기적으로 샘플링하는 통계적 프로파일러입니다.
+
+    별도 스레드에서 `sys._current_frames`로 대상 스레드의 스택을 읽어 집계하며, 결과는
+    flamegraph 도구에서 사용할 수 있는 collapsed stack 형식으로 반환합니다. 실행 중에만
+    샘플링 스레드가 존재하므로 사용하지 않을 때는 비용이 없습니다.
+
+    Attributes:
+        interval (float): 샘플링 주기(초)입니다.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, thread_id: int, seconds: float) -> Dict[str, int]:
+        """
+        대상 스레드를 지정한 시간 동안 샘플링합니다. 호출한 스레드는 샘플링이 끝날 때까지 대기합니다.
+
+        Args:
+            thread_id (int): 샘플링할 스레드의 식별자입니다.
+            seconds (float): 샘플링할 시간(초)입니다.
+
+        Returns:
+            Dict[str, int]: 세미콜론으로 연결한 호출 스택별 샘플 수입니다.
+
+        Raises:
+            RuntimeError: 이미 프로파일링이 실행 중인 경우 발생합니다.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Profiler is already running")
+        try:
+            stacks = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+                time.sleep(self.interval)
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """
+    스택별 샘플 수를 collapsed stack 텍스트로 변환합니다. 샘플 수가 많은 스택이 먼저 나옵니다.
+    """
+    lines = sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+    return "".join(f"{stack} {count}\n" for stack, count in lines)
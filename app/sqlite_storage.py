@@ -0,0 +1,213 @@
+import asyncio
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from .hll import HyperLogLog
+from .storage import URLRecord, URLStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    short_url TEXT NOT NULL UNIQUE,
+    expiration_date TEXT,
+    view_count INTEGER DEFAULT 0,
+    visitor_sketch BLOB
+);
+CREATE TABLE IF NOT EXISTS trending_snapshots (
+    worker_id TEXT PRIMARY KEY,
+    snapshot BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# 모든 연결에 적용하는 설정입니다. WAL 모드에서는 읽기와 쓰기가 서로를 막지 않으며,
+# synchronous=NORMAL은 체크포인트 시점에만 fsync하여 쓰기 지연을 줄입니다.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _to_text(value: Optional[datetime]) -> Optional[str]:
+    # 문자열 비교로 만료 여부를 판단할 수 있도록 항상 같은 형식으로 저장합니다.
+    return value.isoformat(sep=" ", timespec="microseconds") if value is not None else None
+
+
+def _to_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+class SQLiteStorage:
+    """
+    내장 SQLite 데이터베이스를 WAL 모드로 사용하는 저장소 백엔드입니다.
+
+    네트워크 왕복 없이 로컬 파일에서 바로 조회하므로 엣지 노드나 소규모 배포에 적합합니다.
+    읽기는 `readers`개의 읽기 전용 연결 풀에서 병렬로 처리하고, 쓰기는 하나의 연결과 단일
+    스레드 실행기로 직렬화하여 잠금 경합 없이 처리합니다. sqlite3 호출은 모두 실행기 스레드에서
+    수행되므로 이벤트 루프를 막지 않습니다.
+
+    Attributes:
+        path (str): 데이터베이스 파일 경로입니다.
+        readers (int): 읽기 연결 수입니다.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self.readers = readers
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    async def initialize(self):
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="sqlite-reader")
+        await self._write(self._open)
+
+    def _open(self):
+        # 스키마와 WAL 모드를 쓰기 연결에서 먼저 설정한 뒤 읽기 연결을 엽니다.
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        for _ in range(self.readers):
+            self._reader_pool.put(self._connect(read_only=True))
+
+    async def close(self):
+        if self._write_executor is None:
+            return
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        while not self._reader_pool.empty():
+            self._reader_pool.get_nowait().close()
+        self._writer.close()
+        self._writer = None
+        self._write_executor = None
+        self._read_executor = None
+
+    async def _write(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, fn, *args)
+
+    async def _read(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, self._with_reader, fn, args)
+
+    def _with_reader(self, fn, args):
+        conn = self._reader_pool.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self._reader_pool.put(conn)
+
+    async def create(self, url: str, short_url: str, expiration_date: Optional[datetime]) -> URLRecord:
+        if expiration_date is not None and expiration_date.tzinfo is not None:
+            expiration_date = expiration_date.replace(tzinfo=None)
+        return await self._write(self._create, url, short_url, expiration_date)
+
+    def _create(self, url, short_url, expiration_date):
+        with self._writer:
+            cursor = self._writer.execute(
+                "INSERT INTO urls (url, short_url, expiration_date, view_count) VALUES (?, ?, ?, 0)",
+                (url, short_url, _to_text(expiration_date)),
+            )
+        return URLRecord(cursor.lastrowid, url, short_url, expiration_date, 0)
+
+    async def resolve(self, short_url: str) -> Optional[URLRecord]:
+        return await self._read(self._resolve, short_url)
+
+    @staticmethod
+    def _resolve(conn, short_url):
+        row = conn.execute(
+            "SELECT id, url, short_url, expiration_date, view_count FROM urls WHERE short_url = ?",
+            (short_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        expiration_date = _to_datetime(row[3])
+        if expiration_date is not None and expiration_date <= datetime.utcnow():
+            return None
+        return URLRecord(row[0], row[1], row[2], expiration_date, row[4])
+
+    async def increment(self, counts: Dict[str, int]):
+        if counts:
+            await self._write(self._increment, counts)
+
+    def _increment(self, counts):
+        with self._writer:
+            self._writer.executemany(
+                "UPDATE urls SET view_count = COALESCE(view_count, 0) + ? WHERE short_url = ?",
+                [(count, short_url) for short_url, count in counts.items()],
+            )
+
+    async def merge_visitor_sketches(self, sketches: Dict[str, HyperLogLog]):
+        if sketches:
+            await self._write(self._merge_visitor_sketches, sketches)
+
+    def _merge_visitor_sketches(self, sketches):
+        # 별도 프로세스의 쓰기와도 겹치지 않도록 읽기 전에 쓰기 잠금을 잡습니다.
+        placeholders = ", ".join("?" * len(sketches))
+        with self._writer:
+            self._writer.execute("BEGIN IMMEDIATE")
+            rows = self._writer.execute(
+                f"SELECT short_url, visitor_sketch FROM urls WHERE short_url IN ({placeholders})",
+                list(sketches),
+            ).fetchall()
+            updates = []
+            for short_url, stored in rows:
+                sketch = HyperLogLog.from_bytes(stored)
+                sketch.merge(sketches[short_url])
+                updates.append((sketch.to_bytes(), short_url))
+            self._writer.executemany("UPDATE urls SET visitor_sketch = ? WHERE short_url = ?", updates)
+
+    async def stats(self, short_url: str) -> Optional[URLStats]:
+        return await self._read(self._stats, short_url)
+
+    @staticmethod
+    def _stats(conn, short_url):
+        row = conn.execute(
+            "SELECT view_count, visitor_sketch FROM urls WHERE short_url = ?", (short_url,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return URLStats(row[0], row[1])
+
+    async def purge(self):
+        await self._write(self._purge)
+
+    def _purge(self):
+        with self._writer:
+            self._writer.execute("DELETE FROM urls WHERE expiration_date < ?", (_to_text(datetime.utcnow()),))
+
+    async def save_trending(self, worker_id: str, snapshot: bytes, stale_before: datetime):
+        await self._write(self._save_trending, worker_id, snapshot, stale_before)
+
+    def _save_trending(self, worker_id, snapshot, stale_before):
+        with self._writer:
+            self._writer.execute(
+                "INSERT INTO trending_snapshots (worker_id, snapshot, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at",
+                (worker_id, snapshot, _to_text(datetime.utcnow())),
+            )
+            self._writer.execute("DELETE FROM trending_snapshots WHERE updated_at < ?", (_to_text(stale_before),))
+
+    async def load_trending(self) -> Dict[str, bytes]:
+        return await self._read(self._load_trending)
+
+    @staticmethod
+    def _load_trending(conn):
+        return dict(conn.execute("SELECT worker_id, snapshot FROM trending_snapshots").fetchall())
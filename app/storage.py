@@ -0,0 +1,173 @@
+import os
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from . import crud, models
+from .hll import HyperLogLog
+
+# 사용할 저장소 백엔드입니다. sqlalchemy(DATABASE_URL의 PostgreSQL), sqlite, memory 중 하나입니다.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlalchemy")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "urls.db")
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", "4"))
+MEMORY_STORAGE_DIR = os.getenv("MEMORY_STORAGE_DIR", "data")
+MEMORY_COMMIT_DELAY = float(os.getenv("MEMORY_COMMIT_DELAY", "0.002"))
+MEMORY_SNAPSHOT_EVERY = int(os.getenv("MEMORY_SNAPSHOT_EVERY", "100000"))
+
+
+class URLRecord(NamedTuple):
+    """
+    저장소 백엔드가 반환하는 URL 항목입니다.
+
+    `models.URL`과 같은 속성 이름을 사용하므로 `schemas.URL`로 그대로 변환할 수 있습니다.
+    """
+    id: int
+    url: str
+    short_url: str
+    expiration_date: Optional[datetime]
+    view_count: Optional[int]
+
+
+class URLStats(NamedTuple):
+    """
+    단축 URL의 통계 정보입니다.
+
+    Attributes:
+        view_count (int): 조회 수입니다.
+        visitor_sketch (Optional[bytes]): 저장된 고유 방문자 HyperLogLog 스케치입니다.
+    """
+    view_count: int
+    visitor_sketch: Optional[bytes]
+
+
+class StorageBackend(Protocol):
+    """
+    단축 URL 저장소 백엔드가 구현해야 하는 인터페이스입니다.
+
+    생성, 조회, 조회 수 증가, 통계, 만료 항목 삭제와 워커 간 인기 URL 스냅샷 공유를 제공하며, `STORAGE_BACKEND` 설정에 따라
+    `create_storage`가 구현체를 선택합니다.
+    """
+
+    async def initialize(self):
+        """저장소를 열고 필요한 스키마를 생성합니다."""
+
+    async def close(self):
+        """저장소가 사용하는 연결을 모두 닫습니다."""
+
+    async def create(self, url: str, short_url: str, expiration_date: Optional[datetime]):
+        """새로운 URL 항목을 생성하고 반환합니다."""
+
+    async def resolve(self, short_url: str):
+        """만료되지 않은 URL 항목을 반환하고, 없으면 None을 반환합니다."""
+
+    async def increment(self, counts: Dict[str, int]):
+        """단축 URL별 조회 수를 한 번에 증가시킵니다."""
+
+    async def merge_visitor_sketches(self, sketches: Dict[str, HyperLogLog]):
+        """단축 URL별 고유 방문자 스케치를 저장된 스케치와 병합합니다."""
+
+    async def stats(self, short_url: str) -> Optional[URLStats]:
+        """단축 URL의 통계를 반환하고, 없으면 None을 반환합니다."""
+
+    async def purge(self):
+        """만료된 URL 항목을 삭제합니다."""
+
+    async def save_trending(self, worker_id: str, snapshot: bytes, stale_before: datetime):
+        """워커의 인기 URL 스냅샷을 저장하고 `stale_before` 이전에 갱신된 스냅샷을 삭제합니다."""
+
+    async def load_trending(self) -> Dict[str, bytes]:
+        """모든 워커의 인기 URL 스냅샷을 워커 id별로 반환합니다."""
+
+
+class SQLAlchemyStorage:
+    """
+    `app.crud`의 SQLAlchemy 비동기 세션 함수를 사용하는 저장소 백엔드입니다.
+
+    기본 설정에서는 `DATABASE_URL`의 PostgreSQL을 사용하며, 요청마다 새 세션을 열어 crud 함수를
+    호출합니다.
+
+    Attributes:
+        session_factory: 데이터베이스 세션을 생성하는 팩토리입니다.
+        engine (AsyncEngine): 스키마 생성과 종료에 사용하는 엔진입니다.
+    """
+
+    def __init__(self, session_factory, engine):
+        self.session_factory = session_factory
+        self.engine = engine
+
+    async def initialize(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def create(self, url: str, short_url: str, expiration_date: Optional[datetime]):
+        async with self.session_factory() as db:
+            return await crud.create_url(db, url, short_url, expiration_date)
+
+    async def resolve(self, short_url: str):
+        async with self.session_factory() as db:
+            return await crud.get_url_by_short_url(db, short_url)
+
+    async def increment(self, counts: Dict[str, int]):
+        async with self.session_factory() as db:
+            await crud.increment_view_counts(db, counts)
+
+    async def merge_visitor_sketches(self, sketches: Dict[str, HyperLogLog]):
+        async with self.session_factory() as db:
+            await crud.merge_visitor_sketches(db, sketches)
+
+    async def stats(self, short_url: str) -> Optional[URLStats]:
+        async with self.session_factory() as db:
+            row = await crud.get_url_stats(db, short_url)
+            return URLStats(*row) if row is not None else None
+
+    async def purge(self):
+        async with self.session_factory() as db:
+            await crud.delete_expired_urls(db)
+
+    async def save_trending(self, worker_id: str, snapshot: bytes, stale_before: datetime):
+        async with self.session_factory() as db:
+            await crud.save_trending_snapshot(db, worker_id, snapshot, stale_before)
+
+    async def load_trending(self) -> Dict[str, bytes]:
+        async with self.session_factory() as db:
+            return await crud.get_trending_snapshots(db)
+
+
+def create_storage(backend: Optional[str] = None, url: Optional[str] = None) -> StorageBackend:
+    """
+    설정에 맞는 저장소 백엔드를 생성합니다.
+
+    Args:
+        backend (Optional[str]): 백엔드 이름입니다. 생략하면 `STORAGE_BACKEND` 설정을 사용합니다.
+        url (Optional[str]): sqlalchemy 백엔드의 데이터베이스 주소, sqlite 백엔드의 파일 경로 또는
+            memory 백엔드의 디렉터리입니다. 생략하면 `DATABASE_URL`, `SQLITE_PATH`,
+            `MEMORY_STORAGE_DIR` 설정을 사용합니다.
+
+    Returns:
+        StorageBackend: 생성된 저장소 백엔드입니다.
+
+    Raises:
+        ValueError: 지원하지 않는 백엔드 이름인 경우 발생합니다.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "sqlalchemy":
+        # database 모듈은 불러올 때 DATABASE_URL로 엔진을 만들므로 sqlalchemy 백엔드에서만 불러옵니다.
+        from . import database
+        if url is None:
+            return SQLAlchemyStorage(database.SessionLocal, database.engine)
+        engine = create_async_engine(url)
+        return SQLAlchemyStorage(sessionmaker(bind=engine, class_=AsyncSession), engine)
+    if backend == "sqlite":
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(url or SQLITE_PATH, readers=SQLITE_READERS)
+    if backend == "memory":
+        from .memory_storage import MemoryStorage
+        return MemoryStorage(
+            url or MEMORY_STORAGE_DIR, commit_delay=MEMORY_COMMIT_DELAY, snapshot_every=MEMORY_SNAPSHOT_EVERY
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,283 @@
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 지원하는 집계 구간과 반감기(초)입니다.
+WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+# 워커 간 인기 URL 스냅샷을 주고받는 주기(초)와, 갱신이 멈춘 워커의 스냅샷을 버리는 기준(초)입니다.
+TRENDING_SYNC_INTERVAL = float(os.getenv("TRENDING_SYNC_INTERVAL", "5"))
+TRENDING_STALE_AFTER = float(os.getenv("TRENDING_STALE_AFTER", "60"))
+
+# 지수 값이 이 값을 넘으면 가중치가 너무 커지지 않도록 기준 시각을 옮깁니다.
+_MAX_EXPONENT = 60.0
+
+
+class DecayedSpaceSaving:
+    """
+    시간 감쇠를 적용한 Space-Saving 알고리즘으로 최근 많이 조회된 항목을 추적합니다.
+
+    최대 `capacity`개의 카운터만 유지하므로 메모리 사용량이 고정되며, 카운터가 가득 찬 상태에서
+    새 항목이 들어오면 가장 작은 카운터를 대체합니다. 가장 작은 카운터는 지연 무효화 최소 힙으로
+    찾으므로 갱신 비용은 상각 O(log capacity)입니다. 감쇠는 forward decay 방식으로, 새 조회에
+    기준 시각 이후 경과 시간만큼 커진 가중치를 부여하므로 기존 카운터를 매번 갱신할 필요가 없고
+    항목 간 순서도 유지됩니다.
+
+    Attributes:
+        capacity (int): 유지할 최대 카운터 수입니다.
+        half_life (float): 조회 가중치가 절반으로 줄어드는 시간(초)입니다.
+    """
+
+    def __init__(self, capacity: int = 512, half_life: float = 300.0):
+        self.capacity = capacity
+        self.half_life = half_life
+        self._rate = math.log(2) / half_life
+        self._landmark = time.monotonic()
+        self._counts: Dict[str, float] = {}
+        self._errors: Dict[str, float] = {}
+        # 항목마다 하나씩 (카운터 값, 항목)을 보관하는 최소 힙입니다. 기존 항목의 카운터가 늘어도
+        # 힙은 갱신하지 않고, 가장 작은 값을 꺼낼 때 오래된 값이면 현재 값으로 다시 넣습니다.
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _weight(self, now: float) -> float:
+        exponent = (now - self._landmark) * self._rate
+        if exponent > _MAX_EXPONENT:
+            self._rescale(now)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _rescale(self, now: float):
+        factor = math.exp(-(now - self._landmark) * self._rate)
+        self._counts = {key: count * factor for key, count in self._counts.items()}
+        self._errors = {key: error * factor for key, error in self._errors.items()}
+        self._heap = [(count, key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+        self._landmark = now
+
+    def _pop_smallest(self) -> str:
+        # 카운터는 늘어나기만 하므로 힙의 값이 현재 값과 다르면 더 작은 오래된 값입니다.
+        heap, counts = self._heap, self._counts
+        while True:
+            count, key = heap[0]
+            current = counts[key]
+            if current == count:
+                heapq.heappop(heap)
+                return key
+            heapq.heapreplace(heap, (current, key))
+
+    def add(self, key: str, count: float = 1.0, now: Optional[float] = None):
+        """
+        항목의 조회를 기록합니다.
+
+        Args:
+            key (str): 조회된 항목(단축 URL)입니다.
+            count (float): 현재 시각 기준으로 더할 조회 수입니다.
+            now (Optional[float]): 조회 시각입니다. 생략하면 현재 monotonic 시각을 사용합니다.
+        """
+        if now is None:
+            now = time.monotonic()
+        weight = count * self._weight(now)
+        counts = self._counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+            self._errors[key] = 0.0
+            heapq.heappush(self._heap, (weight, key))
+        else:
+            # 가장 작은 카운터를 새 항목으로 대체하고, 대체된 값을 오차로 기록합니다.
+            victim = self._pop_smallest()
+            floor = counts.pop(victim)
+            del self._errors[victim]
+            counts[key] = floor + weight
+            self._errors[key] = floor
+            heapq.heappush(self._heap, (floor + weight, key))
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        감쇠된 조회 수가 가장 큰 상위 k개 항목을 반환합니다.
+
+        카운터 수가 `capacity`로 제한되므로 호출 비용도 상수로 제한됩니다.
+
+        Args:
+            k (int): 반환할 항목 수입니다.
+            now (Optional[float]): 기준 시각입니다. 생략하면 현재 monotonic 시각을 사용합니다.
+
+        Returns:
+            List[Tuple[str, float]]: (항목, 현재 시각 기준 감쇠된 조회 수) 목록입니다.
+        """
+        if now is None:
+            now = time.monotonic()
+        factor = math.exp(-(now - self._landmark) * self._rate)
+        top = heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+        return [(key, count * factor) for key, count in top]
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        다른 워커와 합칠 수 있도록 현재 시각 기준으로 감쇠된 카운터를 반환합니다.
+        """
+        return dict(self.top(len(self._counts), now))
+
+    def merge(self, snapshot: Dict[str, float], now: Optional[float] = None):
+        """
+        다른 워커의 `snapshot` 결과를 현재 스케치에 합칩니다.
+        """
+        for key, count in snapshot.items():
+            self.add(key, count, now)
+
+
+class TrendingTracker:
+    """
+    여러 집계 구간에 대해 최근 인기 단축 URL을 추적합니다.
+
+    `WINDOWS`에 정의된 구간마다 반감기가 다른 `DecayedSpaceSaving` 스케치를 유지하며,
+    클릭 이벤트 파이프라인이 묶음 단위로 `record`를 호출해 갱신합니다. 다른 워커 프로세스의
+    스케치는 `TrendingSync`가 주기적으로 `merge_remote`로 넘겨주며, `top`은 현재 워커의 스케치와
+    합쳐 모든 워커의 조회를 반영한 결과를 반환합니다.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.sketches = {
+            window: DecayedSpaceSaving(capacity, half_life)
+            for window, half_life in WINDOWS.items()
+        }
+        self._remote: Dict[str, DecayedSpaceSaving] = {}
+
+    def record(self, short_url: str, count: int = 1):
+        """
+        단축 URL의 조회를 모든 집계 구간에 기록합니다.
+
+        Args:
+            short_url (str): 조회된 단축 URL입니다.
+            count (int): 기록할 조회 수입니다.
+        """
+        now = time.monotonic()
+        for sketch in self.sketches.values():
+            sketch.add(short_url, count, now=now)
+
+    def to_bytes(self) -> bytes:
+        """
+        다른 워커와 공유할 수 있도록 현재 워커의 카운터를 직렬화합니다.
+
+        monotonic 시각은 프로세스마다 기준이 다르므로, 현재 시각 기준으로 감쇠한 카운터를
+        벽시계 시각과 함께 기록합니다.
+        """
+        now = time.monotonic()
+        payload = {"time": time.time(), "windows": {window: sketch.snapshot(now) for window, sketch in self.sketches.items()}}
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    def merge_remote(self, snapshots: Iterable[bytes]):
+        """
+        다른 워커들의 `to_bytes` 결과를 합쳐 이후 `top` 결과에 반영합니다.
+
+        이전에 합친 결과는 버리고 새로 합치며, 스냅샷을 기록한 뒤 지난 시간만큼 감쇠합니다.
+
+        Args:
+            snapshots (Iterable[bytes]): 현재 워커를 제외한 다른 워커들의 스냅샷입니다.
+        """
+        now, wall = time.monotonic(), time.time()
+        remote = {window: DecayedSpaceSaving(self.capacity, half_life) for window, half_life in WINDOWS.items()}
+        for data in snapshots:
+            payload = json.loads(data)
+            age = max(0.0, wall - payload["time"])
+            for window, counts in payload["windows"].items():
+                sketch = remote.get(window)
+                if sketch is None:
+                    continue
+                factor = 0.5 ** (age / sketch.half_life)
+                sketch.merge({key: count * factor for key, count in counts.items()}, now)
+        self._remote = remote
+
+    def top(self, window: str, k: int) -> List[Tuple[str, float]]:
+        """
+        지정한 집계 구간의 상위 k개 단축 URL을 반환합니다.
+
+        Raises:
+            KeyError: 지원하지 않는 집계 구간인 경우 발생합니다.
+        """
+        sketch = self.sketches[window]
+        remote = self._remote.get(window)
+        if not remote:
+            return sketch.top(k)
+        now = time.monotonic()
+        counts = sketch.snapshot(now)
+        for key, count in remote.snapshot(now).items():
+            counts[key] = counts.get(key, 0.0) + count
+        return heapq.nlargest(k, counts.items(), key=itemgetter(1))
+
+
+class TrendingSync:
+    """
+    워커 프로세스마다 따로 유지되는 인기 URL 스케치를 저장소를 통해 합칩니다.
+
+    `interval`초마다 현재 워커의 스냅샷을 저장소에 기록하고 다른 워커의 스냅샷을 읽어
+    `TrendingTracker.merge_remote`로 넘깁니다. 기본 PostgreSQL 백엔드에서는 모든 워커가 같은
+    테이블을 사용하므로 `/stats/top`은 데이터베이스 조회 없이 최대 `interval`초 전의 다른 워커
+    조회까지 반영합니다. `stale_after`초 동안 갱신되지 않은 스냅샷은 종료된 워커로 보고 삭제합니다.
+
+    Attributes:
+        storage (StorageBackend): 스냅샷을 공유할 저장소 백엔드입니다.
+        tracker (TrendingTracker): 현재 워커의 인기 URL 추적기입니다.
+        interval (float): 스냅샷을 주고받는 주기(초)입니다.
+        stale_after (float): 스냅샷을 버리기 전까지 기다리는 시간(초)입니다.
+        worker_id (str): 현재 워커를 구분하는 id입니다.
+    """
+
+    def __init__(self, storage, tracker: TrendingTracker, interval: float = TRENDING_SYNC_INTERVAL,
+                 stale_after: float = TRENDING_STALE_AFTER, worker_id: Optional[str] = None):
+        self.storage = storage
+        self.tracker = tracker
+        self.interval = interval
+        self.stale_after = stale_after
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """
+        주기적으로 스냅샷을 주고받는 태스크를 시작합니다.
+        """
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        스냅샷을 주고받는 태스크를 종료합니다.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def sync(self):
+        """
+        현재 워커의 스냅샷을 저장하고 다른 워커의 스냅샷을 합칩니다.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        await self.storage.save_trending(self.worker_id, self.tracker.to_bytes(), stale_before)
+        snapshots = await self.storage.load_trending()
+        snapshots.pop(self.worker_id, None)
+        self.tracker.merge_remote(snapshots.values())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync trending snapshots")
@@ -0,0 +1,367 @@
+import asyncio
+import os
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import bindparam, func, insert, update
+
+from . import models
+
+# URL_COMPRESSION=prefix 이면 새 URL을 등록된 공유 접두사와 접미사로 나누어 저장합니다. 조회는 설정과 관계없이 복원합니다.
+URL_COMPRESSION = os.getenv("URL_COMPRESSION", "none")
+# 접두사에 포함할 경로 구간 수입니다. 1이면 https://host/articles/ 까지를 접두사로 사용합니다.
+URL_PREFIX_DEPTH = int(os.getenv("URL_PREFIX_DEPTH", "1"))
+# 일괄 변환 시 이 수 이상의 항목이 공유하는 접두사만 등록합니다.
+URL_PREFIX_MIN_ROWS = int(os.getenv("URL_PREFIX_MIN_ROWS", "10"))
+PREFIX_CACHE_SIZE = int(os.getenv("PREFIX_CACHE_SIZE", "10000"))
+# 등록되지 않은 접두사 조회 결과를 캐시하는 시간(초)입니다. 다른 프로세스가 등록한 접두사는 이 시간 뒤에 사용됩니다.
+PREFIX_MISS_TTL = float(os.getenv("PREFIX_MISS_TTL", "300"))
+
+
+def split_url(url: str, depth: int = URL_PREFIX_DEPTH) -> Tuple[Optional[str], str]:
+    """
+    URL을 공유 접두사와 나머지 접미사로 나눕니다.
+
+    접두사는 scheme, 호스트와 최대 `depth`개의 경로 구간까지이며, 쿼리 문자열과 fragment는
+    항상 접미사에 남습니다. 접두사와 접미사를 이어 붙이면 원래 URL과 정확히 같습니다.
+
+    Args:
+        url (str): 나눌 URL입니다.
+        depth (int): 접두사에 포함할 경로 구간 수입니다.
+
+    Returns:
+        Tuple[Optional[str], str]: 접두사와 접미사입니다. scheme이 없는 URL은 (None, url)을 반환합니다.
+    """
+    scheme_end = url.find("://")
+    if scheme_end <= 0:
+        return None, url
+    host_start = scheme_end + 3
+    end = len(url)
+    for separator in "?#":
+        position = url.find(separator, host_start)
+        if position != -1:
+            end = min(end, position)
+    cut = url.find("/", host_start, end)
+    if cut == -1:
+        return url[:end], url[end:]
+    for _ in range(depth):
+        next_cut = url.find("/", cut + 1, end)
+        if next_cut == -1:
+            break
+        cut = next_cut
+    return url[:cut + 1], url[cut + 1:]
+
+
+def prefix_candidates(url: str, depth: int = URL_PREFIX_DEPTH) -> Iterator[Tuple[str, str]]:
+    """
+    URL을 나눌 수 있는 접두사와 접미사 후보를 긴 접두사부터 반환합니다.
+
+    `depth`까지의 경로를 포함한 접두사 다음에 호스트만 포함한 접두사를 반환합니다. 접미사가
+    비어 있으면 접두사 id만큼 저장 공간이 늘어나므로 후보에서 제외합니다.
+
+    Args:
+        url (str): 나눌 URL입니다.
+        depth (int): 가장 긴 후보 접두사에 포함할 경로 구간 수입니다.
+
+    Yields:
+        Tuple[str, str]: 접두사와 접미사입니다.
+    """
+    seen = None
+    for candidate_depth in (depth, 0):
+        prefix, suffix = split_url(url, candidate_depth)
+        if prefix is None or not suffix or prefix == seen:
+            continue
+        seen = prefix
+        yield prefix, suffix
+
+
+class PrefixCache:
+    """
+    `url_prefixes` 테이블의 접두사를 메모리에 보관하는 LRU 캐시입니다.
+
+    접두사는 한 번 저장되면 바뀌거나 삭제되지 않으므로 무효화 없이 캐시할 수 있습니다. 리디렉션
+    시 URL 복원은 캐시 조회와 문자열 연결만으로 끝나며, 캐시에 없는 접두사만 데이터베이스에서
+    읽습니다. 항목 수가 `maxsize`를 넘으면 가장 오래 사용하지 않은 접두사부터 내보내므로,
+    자주 조회되는 접두사는 계속 캐시에 남습니다. 등록되지 않은 접두사 조회 결과는 `miss_ttl`초
+    동안 캐시하여 새 URL을 저장할 때마다 같은 SELECT를 반복하지 않도록 합니다.
+
+    Attributes:
+        maxsize (int): 캐시할 최대 접두사 수입니다.
+        miss_ttl (float): 등록되지 않은 접두사 조회 결과를 캐시하는 시간(초)입니다.
+    """
+
+    def __init__(self, maxsize: int = PREFIX_CACHE_SIZE, miss_ttl: float = PREFIX_MISS_TTL):
+        self.maxsize = maxsize
+        self.miss_ttl = miss_ttl
+        self._by_id: "OrderedDict[int, str]" = OrderedDict()
+        self._by_prefix: "OrderedDict[str, int]" = OrderedDict()
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_prefix.clear()
+        self._misses.clear()
+
+    def _put(self, prefix_id: int, prefix: str):
+        self._misses.pop(prefix, None)
+        for cache, key, value in ((self._by_id, prefix_id, prefix), (self._by_prefix, prefix, prefix_id)):
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.maxsize:
+                cache.popitem(last=False)
+
+    async def get(self, db: AsyncSession, prefix_id: int) -> str:
+        """
+        id로 접두사를 조회합니다.
+
+        Args:
+            db (AsyncSession): 캐시에 없을 때 사용할 데이터베이스 세션입니다.
+            prefix_id (int): 접두사 id입니다.
+
+        Returns:
+            str: 접두사입니다.
+        """
+        prefix = self._by_id.get(prefix_id)
+        if prefix is None:
+            result = await db.execute(select(models.URLPrefix.prefix).filter(models.URLPrefix.id == prefix_id))
+            prefix = result.scalar_one()
+            self._put(prefix_id, prefix)
+        else:
+            self._by_id.move_to_end(prefix_id)
+        return prefix
+
+    async def lookup(self, db: AsyncSession, prefix: str) -> Optional[int]:
+        """
+        등록된 접두사의 id를 조회합니다. 등록되지 않은 접두사는 새로 저장하지 않습니다.
+
+        Args:
+            db (AsyncSession): 캐시에 없을 때 사용할 데이터베이스 세션입니다.
+            prefix (str): 조회할 접두사입니다.
+
+        Returns:
+            Optional[int]: 접두사 id를 반환하고, 등록되지 않은 접두사이면 None을 반환합니다.
+        """
+        prefix_id = self._by_prefix.get(prefix)
+        if prefix_id is not None:
+            self._by_prefix.move_to_end(prefix)
+            return prefix_id
+        expires_at = self._misses.get(prefix)
+        if expires_at is not None and expires_at > time.monotonic():
+            return None
+        stmt = select(models.URLPrefix.id).filter(models.URLPrefix.prefix == prefix)
+        prefix_id = (await db.execute(stmt)).scalar()
+        if prefix_id is None:
+            self._misses[prefix] = time.monotonic() + self.miss_ttl
+            self._misses.move_to_end(prefix)
+            if len(self._misses) > self.maxsize:
+                self._misses.popitem(last=False)
+        else:
+            self._put(prefix_id, prefix)
+        return prefix_id
+
+    async def intern(self, db: AsyncSession, prefix: str) -> int:
+        """
+        접두사의 id를 반환하고, 없으면 새로 저장합니다.
+
+        새 접두사는 캐시하기 전에 바로 커밋되므로, 세션에 커밋하지 않은 다른 변경이 없을 때
+        호출해야 합니다. 여러 워커가 같은 접두사를 동시에 저장하면 unique 제약으로 하나만 남기고
+        나머지는 저장된 id를 다시 조회합니다.
+
+        Args:
+            db (AsyncSession): 데이터베이스 세션입니다.
+            prefix (str): 저장할 접두사입니다.
+
+        Returns:
+            int: 접두사 id입니다.
+        """
+        prefix_id = self._by_prefix.get(prefix)
+        if prefix_id is not None:
+            self._by_prefix.move_to_end(prefix)
+            return prefix_id
+        stmt = select(models.URLPrefix.id).filter(models.URLPrefix.prefix == prefix)
+        prefix_id = (await db.execute(stmt)).scalar()
+        if prefix_id is None:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(
+                        insert(models.URLPrefix).values(prefix=prefix).returning(models.URLPrefix.id)
+                    )
+                    prefix_id = result.scalar_one()
+            except IntegrityError:
+                prefix_id = (await db.execute(stmt)).scalar_one()
+            await db.commit()
+        self._put(prefix_id, prefix)
+        return prefix_id
+
+
+prefix_cache = PrefixCache()
+
+
+class CompressionReport(NamedTuple):
+    """
+    URL 저장 공간의 압축 결과입니다. 크기는 문자 수 기준이며, 접두사 id는 4바이트로 계산합니다.
+
+    Attributes:
+        rows (int): 전체 URL 항목 수입니다.
+        compressed_rows (int): 접두사로 압축된 항목 수입니다.
+        prefixes (int): 저장된 접두사 수입니다.
+        original_size (int): 압축하지 않았을 때의 URL 크기 합계입니다.
+        stored_size (int): 접미사, 접두사 id, 접두사 테이블을 포함한 실제 크기 합계입니다.
+    """
+    rows: int
+    compressed_rows: int
+    prefixes: int
+    original_size: int
+    stored_size: int
+
+    @property
+    def ratio(self) -> float:
+        return self.original_size / self.stored_size if self.stored_size else 1.0
+
+
+async def compression_report(db: AsyncSession) -> CompressionReport:
+    """
+    현재 `urls` 테이블의 URL 압축률을 계산합니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+
+    Returns:
+        CompressionReport: 압축 결과입니다.
+    """
+    urls, prefixes = models.URL.__table__, models.URLPrefix.__table__
+    stmt = select(
+        func.count(),
+        func.count(urls.c.prefix_id),
+        func.coalesce(func.sum(func.coalesce(
+            func.length(urls.c.url), func.length(prefixes.c.prefix) + func.length(urls.c.url_suffix)
+        )), 0),
+        func.coalesce(func.sum(
+            func.coalesce(func.length(urls.c.url), 0) + func.coalesce(func.length(urls.c.url_suffix), 0)
+        ), 0),
+    ).select_from(urls.outerjoin(prefixes, urls.c.prefix_id == prefixes.c.id))
+    rows, compressed_rows, original_size, stored_size = (await db.execute(stmt)).one()
+    prefix_count, prefix_size = (await db.execute(
+        select(func.count(), func.coalesce(func.sum(func.length(prefixes.c.prefix)), 0))
+    )).one()
+    return CompressionReport(
+        rows, compressed_rows, prefix_count, original_size, stored_size + 4 * compressed_rows + prefix_size
+    )
+
+
+async def _uncompressed_batches(session_factory, batch_size: int):
+    # 압축되지 않은 항목을 id 순서로 `batch_size`개씩 읽어 묶음마다 새 세션과 함께 반환합니다.
+    table = models.URL.__table__
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(table.c.id, table.c.url)
+                .where(table.c.id > last_id, table.c.url.isnot(None), table.c.prefix_id.is_(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield db, rows
+
+
+async def backfill(session_factory, batch_size: int = 1000, depth: int = URL_PREFIX_DEPTH,
+                   min_rows: int = URL_PREFIX_MIN_ROWS) -> int:
+    """
+    압축되지 않은 기존 URL 항목을 접두사와 접미사로 나누어 다시 저장합니다.
+
+    먼저 전체 항목을 읽어 `prefix_candidates`의 후보 접두사별 항목 수를 세고, 이미 압축된 항목을
+    포함해 `min_rows`개 이상이 공유하는 접두사만 사용합니다. 사용자별 경로처럼 공유되지 않는
+    접두사는 호스트만 포함한 접두사로 대신하며, 그것도 공유되지 않으면 압축하지 않습니다.
+    변환은 id 순서로 `batch_size`개씩 묶음마다 하나의 executemany UPDATE와 커밋으로 처리하므로,
+    서비스 중에 실행해도 긴 잠금을 잡지 않으며 중단된 뒤 다시 실행하면 남은 항목부터 이어서
+    처리합니다.
+
+    Args:
+        session_factory: 데이터베이스 세션을 생성하는 팩토리입니다.
+        batch_size (int): 한 번에 처리할 항목 수입니다.
+        depth (int): 접두사에 포함할 경로 구간 수입니다.
+        min_rows (int): 접두사를 등록하는 데 필요한 최소 공유 항목 수입니다.
+
+    Returns:
+        int: 압축한 항목 수입니다.
+    """
+    urls, prefixes = models.URL.__table__, models.URLPrefix.__table__
+    async with session_factory() as db:
+        usage = Counter(dict((await db.execute(
+            select(prefixes.c.prefix, func.count())
+            .select_from(urls.join(prefixes, urls.c.prefix_id == prefixes.c.id))
+            .group_by(prefixes.c.prefix)
+        )).all()))
+    async for _, rows in _uncompressed_batches(session_factory, batch_size):
+        for _, url in rows:
+            usage.update(prefix for prefix, _ in prefix_candidates(url, depth))
+    shared = {prefix for prefix, count in usage.items() if count >= min_rows}
+    del usage
+
+    stmt = (
+        update(urls)
+        .where(urls.c.id == bindparam("b_id"))
+        .values(url=None, prefix_id=bindparam("b_prefix_id"), url_suffix=bindparam("b_suffix"))
+    )
+    converted = 0
+    async for db, rows in _uncompressed_batches(session_factory, batch_size):
+        updates = []
+        for id, url in rows:
+            for prefix, suffix in prefix_candidates(url, depth):
+                if prefix in shared:
+                    updates.append({"b_id": id, "b_prefix_id": await prefix_cache.intern(db, prefix), "b_suffix": suffix})
+                    break
+        if updates:
+            await db.execute(stmt, updates)
+            await db.commit()
+        converted += len(updates)
+    return converted
+
+
+async def match_prefix(db: AsyncSession, url: str, depth: int = URL_PREFIX_DEPTH) -> Tuple[Optional[int], str]:
+    """
+    새 URL에 사용할 등록된 접두사를 찾습니다.
+
+    접두사가 공유되는지는 일괄 변환에서만 알 수 있으므로 새 접두사는 등록하지 않고, `backfill`이
+    등록한 접두사 중 가장 긴 후보를 사용합니다.
+
+    Args:
+        db (AsyncSession): 데이터베이스 세션입니다.
+        url (str): 저장할 URL입니다.
+        depth (int): 가장 긴 후보 접두사에 포함할 경로 구간 수입니다.
+
+    Returns:
+        Tuple[Optional[int], str]: 접두사 id와 접미사입니다. 사용할 접두사가 없으면 (None, url)을 반환합니다.
+    """
+    for prefix, suffix in prefix_candidates(url, depth):
+        prefix_id = await prefix_cache.lookup(db, prefix)
+        if prefix_id is not None:
+            return prefix_id, suffix
+    return None, url
+
+
+async def _main(batch_size: int):
+    from .database import SessionLocal, engine
+
+    converted = await backfill(SessionLocal, batch_size)
+    async with SessionLocal() as db:
+        report = await compression_report(db)
+    await engine.dispose()
+    print(f"compressed rows: {converted:,} (total {report.compressed_rows:,}/{report.rows:,}, {report.prefixes:,} prefixes)")
+    print(f"url size: {report.original_size:,} -> {report.stored_size:,} (ratio {report.ratio:.2f}x)")
+
+
+if __name__ == "__main__":
+    # 사용법: python -m app.url_compression [묶음 크기]
+    asyncio.run(_main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -1,3 +1,4 @@
+import hashlib
 import random
 import string
 
@@ -17,3 +18,21 @@ def generate_short_url(length=6):
     """
     characters = string.ascii_letters + string.digits
     return ''.join(random.choice(characters) for _ in range(length))
+
+
+def hash_visitor(client_host: str, user_agent: str) -> int:
+    """
+    클라이언트 정보를 64비트 정수로 해시하여 방문자 지문을 생성합니다.
+
+    원본 IP나 User-Agent를 저장하지 않고 고유 방문자 수 추정 스케치에만 사용할 수 있도록
+    BLAKE2b 해시의 앞 8바이트를 정수로 변환합니다.
+
+    Args:
+        client_host (str): 클라이언트의 IP 주소입니다.
+        user_agent (str): 클라이언트의 User-Agent 헤더 값입니다.
+
+    Returns:
+        int: 방문자를 식별하는 64비트 해시 값입니다.
+    """
+    digest = hashlib.blake2b(f"{client_host}|{user_agent}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
@@ -0,0 +1,72 @@
+"""
+`PackedIndex`와 `models.URL` 객체 사전의 링크당 메모리 사용량과 조회 시간을 비교합니다.
+
+사용법: python -m benchmarks.packed_index [링크 수]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from app import models
+from app.packed_index import PackedIndex
+from app.utils import generate_short_url
+
+
+def make_rows(count: int):
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_short_url())
+    return [
+        (code, i + 1, f"https://www.example.com/articles/{i}?utm_source=newsletter", None, 0)
+        for i, code in enumerate(codes)
+    ]
+
+
+def measure(build, rows):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(rows)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, memory
+
+
+def build_orm(rows):
+    return {
+        short_url: models.URL(id=id, url=url, short_url=short_url, expiration_date=expiration_date, view_count=view_count)
+        for short_url, id, url, expiration_date, view_count in rows
+    }
+
+
+def build_packed(rows):
+    return PackedIndex.build(rows)[0]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = make_rows(count)
+    url_bytes = sum(len(row[2]) for row in rows) / count
+    samples = [row[0] for row in random.sample(rows, min(count, 100_000))]
+
+    orm, orm_memory = measure(build_orm, rows)
+    started = time.perf_counter()
+    for short_url in samples:
+        orm[short_url].url
+    orm_lookup = (time.perf_counter() - started) / len(samples)
+    del orm
+
+    index, packed_memory = measure(build_packed, rows)
+    started = time.perf_counter()
+    for short_url in samples:
+        index.url(index.find(short_url))
+    packed_lookup = (time.perf_counter() - started) / len(samples)
+
+    print(f"links: {count:,} (average URL {url_bytes:.1f} bytes)")
+    print(f"models.URL dict: {orm_memory / count:.1f} bytes/link, lookup {orm_lookup * 1e6:.2f}us")
+    print(f"PackedIndex: {packed_memory / count:.1f} bytes/link ({index.nbytes / count:.1f} in arrays), "
+          f"lookup {packed_lookup * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -262,4 +262,18 @@ class TestDeleteExpiredUrls(unittest.IsolatedAsyncioTestCase):
         # 직접 쿼리 비교
         self.assertEqual(str(stmt), str(actual_stmt), f"Expected: {stmt}, Actual: {actual_stmt}")
 
-        mock_db.commit.assert_called_once()  # 트랜잭션 커밋이 한 번 호출되었는지 확인
\ No newline at end of file
+        mock_db.commit.assert_called_once()  # 트랜잭션 커밋이 한 번 호출되었는지 확인
+
+class TestIncrementViewCounts(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_in_short_url_order(self):
+        """
+        조회 수 일괄 증가 순서 테스트:
+        - 워커 간 교착 상태를 피하도록 이벤트 도착 순서와 관계없이 단축 URL 순서로 갱신해야 합니다.
+        """
+        mock_db = AsyncMock(spec=AsyncSession)
+
+        await crud.increment_view_counts(mock_db, {"ccc": 1, "aaa": 2, "bbb": 3})
+
+        args, kwargs = mock_db.execute.call_args
+        self.assertEqual([params["b_short_url"] for params in args[1]], ["aaa", "bbb", "ccc"])
+        mock_db.commit.assert_called_once()
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.events import ClickEvent, ClickPipeline, ClickWriter, ProcessClickPipeline
+from app.hll import HyperLogLog
+from app.trending import TrendingTracker
+from app.utils import hash_visitor
+
+
+class TestClickPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_stop_flushes_batched_events(self):
+        """
+        파이프라인 종료 시 반영 테스트:
+        - 큐에 남은 이벤트가 단축 URL별로 합산되어 반영되고, 스케치도 모두 저장되어야 합니다.
+        """
+        mock_storage = AsyncMock()
+        pipeline = ClickPipeline(mock_storage, batch_size=100)
+        pipeline.start()
+        for visitor in ("a", "b", "a"):
+            await pipeline.enqueue(ClickEvent("short1", hash_visitor(visitor, "agent")))
+        await pipeline.enqueue(ClickEvent("short2", hash_visitor("a", "agent")))
+        await pipeline.stop()
+
+        counts = {}
+        for call in mock_storage.increment.await_args_list:
+            for short_url, count in call[0][0].items():
+                counts[short_url] = counts.get(short_url, 0) + count
+        self.assertEqual(counts, {"short1": 3, "short2": 1})
+
+        sketches = mock_storage.merge_visitor_sketches.await_args[0][0]
+        self.assertEqual(sketches["short1"].estimate(), 2)
+        self.assertEqual(len(pipeline.writer.visitor_sketches), 0)
+
+    async def test_records_trending_from_consumer(self):
+        """
+        인기 URL 집계 테스트:
+        - 인기 URL 스케치는 요청 처리 중이 아니라 워커가 이벤트 묶음을 처리할 때 갱신되어야 합니다.
+        """
+        trending = TrendingTracker()
+        pipeline = ClickPipeline(AsyncMock(), batch_size=100, trending=trending)
+        pipeline.start()
+        for short_url in ("hot", "hot", "cold"):
+            await pipeline.enqueue(ClickEvent(short_url, hash_visitor("a", "agent")))
+        self.assertEqual(trending.top("5m", 2), [])
+        await pipeline.stop()
+        top = trending.top("5m", 2)
+        self.assertEqual([key for key, _ in top], ["hot", "cold"])
+        self.assertAlmostEqual(top[0][1], 2.0, places=3)
+
+    async def test_enqueue_waits_when_full(self):
+        """
+        역압 테스트:
+        - 큐가 가득 차면 enqueue가 자리가 생길 때까지 대기해야 합니다.
+        """
+        pipeline = ClickPipeline(AsyncMock(), maxsize=1)
+        pipeline._queue = asyncio.Queue(1)
+        await pipeline.enqueue(ClickEvent("short1", 1))
+        blocked = asyncio.create_task(pipeline.enqueue(ClickEvent("short1", 2)))
+        await asyncio.sleep(0)
+        self.assertFalse(blocked.done())
+        pipeline._queue.get_nowait()
+        await asyncio.wait_for(blocked, timeout=1)
+
+    async def test_enqueue_requires_start(self):
+        """
+        시작 전 enqueue 테스트:
+        - 파이프라인이 시작되지 않았다면 RuntimeError가 발생해야 합니다.
+        """
+        pipeline = ClickPipeline(AsyncMock())
+        with self.assertRaises(RuntimeError):
+            await pipeline.enqueue(ClickEvent("short1", 1))
+
+
+class TestClickWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_failed_batch(self):
+        """
+        반영 실패 후 재시도 테스트:
+        - 실패한 묶음의 조회 수와 스케치는 버려지지 않고 다음 묶음과 합쳐 다시 반영되어야 합니다.
+        """
+        mock_storage = AsyncMock()
+        mock_storage.increment.side_effect = [RuntimeError("deadlock detected"), None, None]
+        mock_storage.merge_visitor_sketches.side_effect = [RuntimeError("deadlock detected"), None]
+        writer = ClickWriter(mock_storage)
+
+        with self.assertLogs("app.events"):
+            await writer.write([ClickEvent("short1", hash_visitor("a", "agent"))])
+        await writer.write([ClickEvent("short1", hash_visitor("b", "agent")), ClickEvent("short2", 1)])
+        self.assertEqual(mock_storage.increment.await_args[0][0], {"short1": 2, "short2": 1})
+
+        writer.visitor_sketches.max_links = 1
+        with self.assertLogs("app.events"):
+            await writer.write([ClickEvent("short1", hash_visitor("c", "agent"))])
+        await writer.write([], final=True)
+        sketches = mock_storage.merge_visitor_sketches.await_args[0][0]
+        self.assertEqual(sketches["short1"].estimate(), 3)
+        self.assertEqual(len(writer.visitor_sketches), 0)
+
+    async def test_drops_after_max_retries(self):
+        """
+        재시도 한도 테스트:
+        - 연속 실패가 한도를 넘으면 보관한 조회 수를 버려 메모리가 계속 늘어나지 않아야 합니다.
+        """
+        mock_storage = AsyncMock()
+        mock_storage.increment.side_effect = RuntimeError("database is down")
+        writer = ClickWriter(mock_storage, max_retries=2)
+
+        with self.assertLogs("app.events") as logs:
+            await writer.write([ClickEvent("short1", 1)])
+            await writer.write([])
+            await writer.write([])
+        self.assertEqual(mock_storage.increment.await_count, 3)
+        self.assertIn("Dropping", logs.output[-1])
+        await writer.write([])
+        self.assertEqual(mock_storage.increment.await_count, 3)
+
+
+class TestProcessClickPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_worker_process_applies_events(self):
+        """
+        별도 프로세스 워커 테스트:
+        - 워커 프로세스가 실제 데이터베이스에 조회 수와 스케치를 반영해야 합니다.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clicks.db")
+            sync_engine = create_engine(f"sqlite:///{path}")
+            models.Base.metadata.create_all(sync_engine)
+            with Session(sync_engine) as session:
+                session.add(models.URL(url="http://example.com", short_url="short1", view_count=0))
+                session.commit()
+
+            pipeline = ProcessClickPipeline("sqlalchemy", f"sqlite+aiosqlite:///{path}", flush_interval=0.1)
+            pipeline.start()
+            for visitor in ("a", "b", "c"):
+                await pipeline.enqueue(ClickEvent("short1", hash_visitor(visitor, "agent")))
+            await pipeline.stop()
+
+            with Session(sync_engine) as session:
+                db_url = session.execute(select(models.URL)).scalars().one()
+                self.assertEqual(db_url.view_count, 3)
+                self.assertEqual(HyperLogLog.from_bytes(db_url.visitor_sketch).estimate(), 3)
+            sync_engine.dispose()
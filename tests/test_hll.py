@@ -0,0 +1,79 @@
+import unittest
+
+from app.hll import HyperLogLog, VisitorSketchBuffer, SKETCH_SIZE
+from app.utils import hash_visitor
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_estimate_small_cardinality(self):
+        """
+        적은 수의 방문자 추정 테스트:
+        - 작은 카디널리티에서는 정확한 값에 가깝게 추정해야 합니다.
+        """
+        sketch = HyperLogLog()
+        for i in range(100):
+            sketch.add(hash_visitor(f"10.0.0.{i}", "agent"))
+            sketch.add(hash_visitor(f"10.0.0.{i}", "agent"))  # 중복 방문은 무시되어야 합니다.
+        self.assertAlmostEqual(sketch.estimate(), 100, delta=3)
+
+    def test_estimate_large_cardinality(self):
+        """
+        많은 수의 방문자 추정 테스트:
+        - 표준 오차의 몇 배 이내로 추정해야 하며, 크기는 고정되어야 합니다.
+        """
+        sketch = HyperLogLog()
+        for i in range(50000):
+            sketch.add(hash_visitor(str(i), "agent"))
+        self.assertAlmostEqual(sketch.estimate(), 50000, delta=50000 * 0.08)
+        self.assertEqual(len(sketch.to_bytes()), SKETCH_SIZE)
+
+    def test_merge_and_round_trip(self):
+        """
+        스케치 병합 및 직렬화 테스트:
+        - 병합 결과는 합집합의 추정치여야 하고, 바이트 변환 후에도 동일해야 합니다.
+        """
+        left, right = HyperLogLog(), HyperLogLog()
+        for i in range(1000):
+            left.add(hash_visitor(str(i), "agent"))
+        for i in range(500, 1500):
+            right.add(hash_visitor(str(i), "agent"))
+        left.merge(right)
+        restored = HyperLogLog.from_bytes(left.to_bytes())
+        self.assertEqual(restored.registers, left.registers)
+        self.assertAlmostEqual(restored.estimate(), 1500, delta=1500 * 0.08)
+
+    def test_rejects_wrong_size(self):
+        """
+        잘못된 크기의 스케치 복원 테스트:
+        - 고정 크기가 아니면 ValueError가 발생해야 합니다.
+        """
+        with self.assertRaises(ValueError):
+            HyperLogLog(b"\x00" * 10)
+
+
+class TestVisitorSketchBuffer(unittest.TestCase):
+    def test_flush_by_size(self):
+        """
+        버퍼 크기에 따른 저장 테스트:
+        - 링크 수가 기준에 도달하면 저장해야 하며, drain 후에는 비어 있어야 합니다.
+        """
+        buffer = VisitorSketchBuffer(max_links=2, max_age=60)
+        buffer.add("a", hash_visitor("1", "agent"))
+        self.assertFalse(buffer.should_flush())
+        buffer.add("b", hash_visitor("1", "agent"))
+        self.assertTrue(buffer.should_flush())
+        self.assertEqual(set(buffer.drain()), {"a", "b"})
+        self.assertEqual(len(buffer), 0)
+        self.assertFalse(buffer.should_flush())
+
+    def test_estimate_merges_pending(self):
+        """
+        저장되지 않은 방문자 반영 테스트:
+        - 저장된 스케치와 대기 중인 스케치를 합쳐 추정해야 합니다.
+        """
+        stored = HyperLogLog()
+        stored.add(hash_visitor("1", "agent"))
+        buffer = VisitorSketchBuffer()
+        buffer.add("a", hash_visitor("2", "agent"))
+        self.assertEqual(buffer.estimate("a", stored.to_bytes()), 2)
+        self.assertEqual(buffer.estimate("b", None), 0)
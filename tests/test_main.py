@@ -5,6 +5,10 @@ from datetime import datetime
 
 from app.main import app
 from app import crud, schemas
+from app.events import ClickEvent, ClickPipeline
+from app.hll import HyperLogLog
+from app.trending import TrendingTracker
+from app.utils import hash_visitor
 
 client = TestClient(app)
 
@@ -31,8 +35,8 @@ async def test_create_short_url(mock_generate_short_url, mock_get_url_by_short_u
 
 @pytest.mark.asyncio
 @patch("app.crud.get_url_by_short_url", new_callable=AsyncMock)
-@patch("app.crud.increment_view_count", new_callable=AsyncMock)
-async def test_redirect_to_original_url(mock_increment_view_count, mock_get_url_by_short_url):
+@patch("app.main.click_pipeline", new_callable=AsyncMock)
+async def test_redirect_to_original_url(mock_click_pipeline, mock_get_url_by_short_url):
     # URL 조회 모킹
     mock_get_url_by_short_url.return_value = schemas.URL(
         id=1,
@@ -41,34 +45,34 @@ async def test_redirect_to_original_url(mock_increment_view_count, mock_get_url_
         expiration_date=datetime.fromisoformat("2024-12-31T00:00:00")
     )
     
-    # `AsyncSession` 모킹
-    mock_session = AsyncMock()
-    
-    # increment_view_count가 `AsyncSession`을 인자로 받을 것이라고 가정
-    mock_increment_view_count.return_value = None  # 이 테스트에서는 반환 값을 사용하지 않음
-    
     # 클라이언트에서의 요청 처리
     response = client.get("/short1234", allow_redirects=False)
     
     assert response.status_code == 301
     assert response.headers["location"] == "http://example.com"
     
-    # 호출된 인자 확인 (두 번째 인자는 "short1234"여야 함)
-    call_args = mock_increment_view_count.await_args
-    assert call_args[0][1] == "short1234"
+    # 조회 수 증가는 클릭 이벤트로 큐에 들어가야 함
+    event = mock_click_pipeline.enqueue.await_args[0][0]
+    assert isinstance(event, ClickEvent)
+    assert event.short_url == "short1234"
 
 
 @pytest.mark.asyncio
-@patch("app.crud.get_view_count", new_callable=AsyncMock)
-async def test_get_stats(mock_get_view_count):
-    # 조회 수 반환 모킹
-    mock_get_view_count.return_value = 5
+@patch("app.main.click_pipeline", new=ClickPipeline(storage=None))
+@patch("app.crud.get_url_stats", new_callable=AsyncMock)
+async def test_get_stats(mock_get_url_stats):
+    # 조회 수 5와 3명의 방문자가 기록된 스케치 반환 모킹
+    sketch = HyperLogLog()
+    for visitor in ("a", "b", "c"):
+        sketch.add(hash_visitor(visitor, "agent"))
+    mock_get_url_stats.return_value = (5, sketch.to_bytes())
 
     response = client.get("/stats/short1234")
     assert response.status_code == 200
     data = response.json()
     assert data["short_url"] == "short1234"
     assert data["view_count"] == 5
+    assert data["unique_visitors"] == 3
 
 @pytest.mark.asyncio
 @patch("app.crud.get_url_by_short_url", new_callable=AsyncMock)
@@ -81,11 +85,45 @@ async def test_redirect_to_original_url_not_found(mock_get_url_by_short_url):
     assert response.json() == {"detail": "URL not found"}
 
 @pytest.mark.asyncio
-@patch("app.crud.get_view_count", new_callable=AsyncMock)
-async def test_get_stats_not_found(mock_get_view_count):
-    # 조회 수를 찾지 못함을 모킹
-    mock_get_view_count.return_value = None
+@patch("app.crud.get_url_stats", new_callable=AsyncMock)
+async def test_get_stats_not_found(mock_get_url_stats):
+    # 통계를 찾지 못함을 모킹
+    mock_get_url_stats.return_value = None
 
     response = client.get("/stats/short1234")
     assert response.status_code == 404
-    assert response.json() == {"detail": "URL not found"}
\ No newline at end of file
+    assert response.json() == {"detail": "URL not found"}
+
+@patch("app.main.trending", new_callable=TrendingTracker)
+def test_get_top_urls(mock_trending):
+    # 조회 기록 모킹
+    for _ in range(3):
+        mock_trending.record("hot")
+    mock_trending.record("cold")
+
+    response = client.get("/stats/top?window=5m&k=1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["window"] == "5m"
+    assert [item["short_url"] for item in data["urls"]] == ["hot"]
+
+def test_get_top_urls_invalid_window():
+    response = client.get("/stats/top?window=7m")
+    assert response.status_code == 400
+
+def test_profile_disabled_without_admin_token():
+    response = client.post("/admin/profile?seconds=0.01")
+    assert response.status_code == 404
+
+@patch("app.main.ADMIN_TOKEN", "secret")
+def test_profile_rejects_wrong_token():
+    response = client.post("/admin/profile?seconds=0.01", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+@patch("app.main.ADMIN_TOKEN", "secret")
+def test_profile_returns_collapsed_stacks():
+    response = client.post("/admin/profile?seconds=0.05", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    line = response.text.splitlines()[0]
+    assert int(line.rsplit(" ", 1)[1]) > 0
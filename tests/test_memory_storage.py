@@ -0,0 +1,194 @@
+import asyncio
+import os
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.hll import HyperLogLog
+from app.memory_storage import MemoryStorage
+from app.utils import hash_visitor
+
+
+def crash(storage):
+    # 스냅샷을 남기지 않고 파일과 스레드만 정리하여 비정상 종료를 흉내 냅니다.
+    storage._log.close()
+    storage._log_executor.shutdown(wait=True)
+    storage._snapshot_executor.shutdown(wait=True)
+    storage._lock_file.close()
+
+
+async def populate(storage):
+    await storage.create("http://example.com/a", "a", None)
+    await storage.create("http://example.com/b", "b", datetime.utcnow() + timedelta(days=1))
+    await storage.increment({"a": 2, "b": 1})
+    sketch = HyperLogLog()
+    sketch.add(hash_visitor("visitor", "agent"))
+    await storage.merge_visitor_sketches({"a": sketch})
+
+
+async def assert_populated(storage):
+    assert (await storage.resolve("a")).url == "http://example.com/a"
+    assert (await storage.stats("a")).view_count == 2
+    assert (await storage.stats("b")).view_count == 1
+    assert HyperLogLog.from_bytes((await storage.stats("a")).visitor_sketch).estimate() == 1
+
+
+async def test_recovers_from_log_after_crash(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await populate(storage)
+    crash(storage)
+    assert not os.path.exists(tmp_path / "snapshot.tsv")
+
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    await assert_populated(recovered)
+    # 재생한 로그는 스냅샷으로 합쳐지고 새 항목의 id는 이어서 발급되어야 합니다.
+    assert os.path.exists(tmp_path / "snapshot.tsv")
+    assert (await recovered.create("http://example.com/c", "c", None)).id == 3
+    await recovered.close()
+
+
+async def test_recovers_from_snapshot_and_log_tail(tmp_path):
+    storage = MemoryStorage(str(tmp_path), snapshot_every=3)
+    await storage.initialize()
+    await populate(storage)
+    await storage.increment({"a": 5})
+    await asyncio.sleep(0.05)
+    crash(storage)
+    logs = sorted(path.name for path in tmp_path.glob("log.*.jsonl"))
+    assert len(logs) == 1  # 스냅샷 이전 세대의 로그는 삭제되어야 합니다.
+
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    assert (await recovered.stats("a")).view_count == 7
+    await recovered.close()
+
+
+async def test_ignores_torn_last_record(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await populate(storage)
+    crash(storage)
+    with open(tmp_path / "log.0.jsonl", "a") as f:
+        f.write('{"op":"increment","counts":{"a":')
+
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    await assert_populated(recovered)
+    await recovered.close()
+
+
+async def test_truncates_torn_first_record_of_active_log(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await storage.create("http://example.com/a", "aaaaaa", None)
+    await storage.close()
+    with open(tmp_path / "log.1.jsonl", "a") as f:
+        f.write('{"op":"increment","counts":{"aaaaaa":')
+
+    # 재생한 레코드가 없어 스냅샷을 만들지 않아도, 이후 기록은 잘린 레코드와 분리되어야 합니다.
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    assert (tmp_path / "log.1.jsonl").read_text() == ""
+    await recovered.create("http://example.com/b", "bbbbbb", None)
+    await recovered.increment({"aaaaaa": 5})
+    crash(recovered)
+
+    replayed = MemoryStorage(str(tmp_path))
+    await replayed.initialize()
+    assert (await replayed.resolve("bbbbbb")).url == "http://example.com/b"
+    assert (await replayed.stats("aaaaaa")).view_count == 5
+    await replayed.close()
+
+
+async def test_rejects_second_process(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    with pytest.raises(RuntimeError):
+        await MemoryStorage(str(tmp_path)).initialize()
+    await storage.close()
+
+    # 잠금은 종료할 때 해제되어야 합니다.
+    reopened = MemoryStorage(str(tmp_path))
+    await reopened.initialize()
+    await reopened.close()
+
+
+async def test_group_commit_shares_fsync(tmp_path):
+    storage = MemoryStorage(str(tmp_path), commit_delay=0.01)
+    await storage.initialize()
+    with patch("app.memory_storage.os.fsync") as mock_fsync:
+        await asyncio.gather(*(storage.create(f"http://example.com/{i}", f"s{i}", None) for i in range(50)))
+    assert mock_fsync.call_count == 1
+    assert len(storage) == 50
+    await storage.close()
+
+
+async def test_snapshot_round_trip_escapes_urls(tmp_path):
+    url = "http://example.com/a\tb\nc\\d\re\r\nf"
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await storage.create(url, "tricky", datetime(2099, 1, 1, 12, 30))
+    await storage.close()
+
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    record = await recovered.resolve("tricky")
+    assert record.url == url
+    assert record.expiration_date == datetime(2099, 1, 1, 12, 30)
+    await recovered.close()
+
+
+async def test_packed_entries_after_restart(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await storage.create("http://example.com/kept", "kept00", None)
+    await storage.create("http://example.com/old", "old000", datetime.utcnow() + timedelta(seconds=1))
+    await storage.create("http://example.com/moved", "moved0", None)
+    await storage.close()
+
+    recovered = MemoryStorage(str(tmp_path))
+    await recovered.initialize()
+    assert len(recovered._index) == 3 and not recovered._entries
+    await recovered.increment({"kept00": 4})
+    sketch = HyperLogLog()
+    sketch.add(hash_visitor("visitor", "agent"))
+    await recovered.merge_visitor_sketches({"kept00": sketch, "moved0": sketch})
+    await recovered.create("http://example.com/new", "moved0", None)
+    with patch("app.memory_storage.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = datetime.utcnow() + timedelta(days=1)
+        mock_datetime.fromisoformat = datetime.fromisoformat
+        await recovered.purge()
+
+    assert (await recovered.stats("kept00")).view_count == 4
+    assert HyperLogLog.from_bytes((await recovered.stats("kept00")).visitor_sketch).estimate() == 1
+    assert await recovered.resolve("old000") is None
+    # 다시 생성된 코드는 이전 항목의 조회 수와 스케치를 이어받지 않아야 합니다.
+    assert (await recovered.resolve("moved0")).url == "http://example.com/new"
+    assert (await recovered.stats("moved0")) == (0, None)
+    crash(recovered)
+
+    replayed = MemoryStorage(str(tmp_path))
+    await replayed.initialize()
+    assert len(replayed) == 2
+    assert (await replayed.stats("kept00")).view_count == 4
+    assert (await replayed.resolve("moved0")).url == "http://example.com/new"
+    await replayed.close()
+
+
+async def test_writes_during_compaction_are_kept(tmp_path):
+    storage = MemoryStorage(str(tmp_path))
+    await storage.initialize()
+    await asyncio.gather(*(storage.create(f"http://example.com/{i}", f"{i:06d}", None) for i in range(100)))
+    snapshot = asyncio.ensure_future(storage.snapshot())
+    await asyncio.sleep(0)
+    await storage.create("http://example.com/late", "late00", None)
+    await storage.increment({"000001": 3})
+    await snapshot
+
+    assert len(storage._index) == 100
+    assert (await storage.resolve("late00")).url == "http://example.com/late"
+    assert (await storage.stats("000001")).view_count == 3
+    await storage.close()
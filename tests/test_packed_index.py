@@ -0,0 +1,123 @@
+import unittest
+from datetime import datetime
+
+from app.packed_index import PackedIndex, decode_code, encode_code
+
+
+def make_rows(count):
+    return [
+        (decode_code(i * 7919), i + 1, f"https://www.example.com/articles/{i}", None, i)
+        for i in range(count)
+    ]
+
+
+class TestCodeEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        """
+        단축 코드 변환 테스트:
+        - 6자리 base62 코드는 정수로 변환한 뒤 그대로 복원되어야 하며, 그 외 코드는 변환하지 않아야 합니다.
+        """
+        for code in ("000000", "abcXYZ", "ZZZZZZ", "a1B2c3"):
+            self.assertEqual(decode_code(encode_code(code)), code)
+        self.assertLess(encode_code("ZZZZZZ"), 2 ** 63)
+        self.assertIsNone(encode_code("abc"))
+        self.assertIsNone(encode_code("abc-de"))
+
+
+class TestPackedIndex(unittest.TestCase):
+    def test_build_and_find(self):
+        """
+        인덱스 생성과 조회 테스트:
+        - 정렬되지 않은 입력으로 만들어도 모든 코드를 찾아야 하고, 압축할 수 없는 코드는 따로 반환해야 합니다.
+        """
+        rows = make_rows(1000)
+        expiration = datetime(2099, 1, 1, 12, 30)
+        rows.append(("custom-link", 1001, "https://example.com/custom", None, 0))
+        rows.append(("zzzzzz", 1002, "https://example.com/ünïcode", expiration, 3))
+        index, leftovers = PackedIndex.build(reversed(rows))
+
+        self.assertEqual(len(index), 1001)
+        self.assertEqual([row[0] for row in leftovers], ["custom-link"])
+        for short_url, id, url, _, view_count in rows[:-2]:
+            position = index.find(short_url)
+            self.assertEqual(index.ids[position], id)
+            self.assertEqual(index.url(position), url)
+            self.assertEqual(index.view_counts[position], view_count)
+        position = index.find("zzzzzz")
+        self.assertEqual(index.url(position), "https://example.com/ünïcode")
+        self.assertEqual(index.expiration_date(position), expiration)
+        self.assertEqual(index.find("yyyyyy"), -1)
+        self.assertEqual(index.find("custom-link"), -1)
+
+    def test_delete_and_purge(self):
+        """
+        삭제 테스트:
+        - 삭제 표시된 항목과 만료된 항목은 조회와 순회에서 제외되어야 합니다.
+        """
+        index, _ = PackedIndex.build([
+            ("aaaaaa", 1, "https://example.com/a", None, 0),
+            ("bbbbbb", 2, "https://example.com/b", datetime(2000, 1, 1), 0),
+            ("cccccc", 3, "https://example.com/c", datetime(2099, 1, 1), 0),
+        ])
+        index.delete(index.find("aaaaaa"))
+        self.assertEqual(index.purge(datetime(2024, 1, 1)), ["bbbbbb"])
+        self.assertEqual(index.find("aaaaaa"), -1)
+        self.assertEqual(index.find("bbbbbb"), -1)
+        self.assertEqual([row[0] for row in index.rows()], ["cccccc"])
+        self.assertEqual(len(index), 1)
+
+    def test_merge(self):
+        """
+        병합 테스트:
+        - 삭제 표시된 항목은 빠지고, 새 항목은 정렬 위치에 들어가며, 같은 코드는 새 항목이 우선해야 합니다.
+        """
+        rows = make_rows(1000)
+        base, _ = PackedIndex.build(rows)
+        ids = base.ids[:]
+        for short_url in (rows[0][0], rows[500][0], rows[999][0]):
+            ids[base.find(short_url)] = 0
+        additions = [
+            ("000001", 2001, "https://example.com/first", None, 0),
+            ("ZZZZZZ", 2002, "https://example.com/last", datetime(2099, 1, 1), 1),
+            (rows[10][0], 2003, "https://example.com/replaced", None, 2),
+            ("custom-link", 2004, "https://example.com/custom", None, 0),
+        ]
+        merged, leftovers = base.merge(additions, ids=ids)
+
+        self.assertEqual([row[0] for row in leftovers], ["custom-link"])
+        expected = {row[0]: row for row in rows[1:500] + rows[501:999]}
+        expected.update({row[0]: row for row in additions[:3]})
+        self.assertEqual(list(merged.rows()), sorted(expected.values(), key=lambda row: encode_code(row[0])))
+        self.assertEqual(len(merged.keys), len(expected))
+        self.assertEqual(len(merged.arena), sum(len(row[2]) for row in expected.values()))
+        # 원래 인덱스는 바뀌지 않아야 합니다.
+        self.assertEqual(base.url(base.find(rows[10][0])), rows[10][2])
+
+    def test_from_sorted(self):
+        """
+        정렬된 입력으로 인덱스 생성 테스트:
+        - 미리 할당한 크기로 채우고, 순서가 어긋나거나 크기를 넘는 항목도 빠짐없이 담아야 합니다.
+        """
+        rows = sorted(make_rows(100), key=lambda row: encode_code(row[0]))
+        arena_size = sum(len(row[2]) for row in rows)
+        index, _ = PackedIndex.from_sorted(rows, len(rows), arena_size)
+        self.assertEqual(list(index.rows()), rows)
+        self.assertEqual(len(index.arena), arena_size)
+
+        shuffled = rows[50:] + rows[:50]
+        index, _ = PackedIndex.from_sorted(shuffled, 10, 100)
+        self.assertEqual(list(index.rows()), rows)
+        index, _ = PackedIndex.from_sorted(rows, 200, arena_size * 2)
+        self.assertEqual(list(index.rows()), rows)
+
+    def test_bytes_per_entry(self):
+        """
+        메모리 사용량 테스트:
+        - 일반적인 길이의 URL에서 항목당 100바이트 미만이어야 합니다.
+        """
+        index, _ = PackedIndex.build(make_rows(10000))
+        self.assertLess(index.nbytes / len(index), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, models
+from app.profiling import SamplingProfiler, format_collapsed, install_slow_query_log, normalize_statement
+
+
+class TestNormalizeStatement(unittest.TestCase):
+    def test_replaces_literals_and_placeholders(self):
+        """
+        SQL 정규화 테스트:
+        - 리터럴, 자리 표시자, IN 목록이 값에 관계없이 같은 형태로 바뀌어야 합니다.
+        """
+        statement = """SELECT urls.id FROM urls
+            WHERE urls.short_url = $1 AND urls.view_count > 10 AND urls.url = 'a''b'
+            AND urls.short_url IN (?, ?, ?) AND urls.id = %(id_1)s AND urls.url = :url::text"""
+        self.assertEqual(
+            normalize_statement(statement),
+            "SELECT urls.id FROM urls WHERE urls.short_url = ? AND urls.view_count > ? AND urls.url = ? "
+            "AND urls.short_url IN (?, ...) AND urls.id = ? AND urls.url = ?::text",
+        )
+
+
+class TestSlowQueryLog(unittest.IsolatedAsyncioTestCase):
+    async def test_logs_slow_query_with_caller(self):
+        """
+        느린 쿼리 로그 테스트:
+        - 기준 시간을 넘은 쿼리는 정규화된 SQL과 호출한 crud 함수 이름과 함께 기록되어야 합니다.
+        """
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        install_slow_query_log(engine, threshold_ms=0)
+
+        with self.assertLogs("app.slow_query", level="WARNING") as logs:
+            async with AsyncSession(engine) as db:
+                await crud.get_view_count(db, "short1")
+        await engine.dispose()
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("caller=get_view_count", logs.output[0])
+        self.assertIn("params=1", logs.output[0])
+        self.assertIn("WHERE urls.short_url = ?", logs.output[0])
+
+    async def test_failed_statement_does_not_leak_state(self):
+        """
+        실패한 쿼리 테스트:
+        - 실패한 SQL 문이 연결에 상태를 남기지 않고, 이후 쿼리는 정상적으로 기록되어야 합니다.
+        """
+        engine = create_async_engine("sqlite+aiosqlite://")
+        install_slow_query_log(engine, threshold_ms=0)
+
+        with self.assertLogs("app.slow_query", level="WARNING") as logs:
+            async with engine.connect() as conn:
+                with self.assertRaises(OperationalError):
+                    await conn.execute(text("SELECT * FROM missing_table"))
+                await conn.execute(text("SELECT 1"))
+                info = dict((await conn.get_raw_connection()).info)
+        await engine.dispose()
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("SELECT ?", logs.output[0])
+        self.assertNotIn("query_start_time", info)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_collects_stacks_of_target_thread(self):
+        """
+        샘플링 프로파일러 테스트:
+        - 대상 스레드에서 실행 중인 함수가 collapsed stack에 포함되어야 합니다.
+        """
+        stop = threading.Event()
+
+        def busy_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop)
+        worker.start()
+        try:
+            stacks = SamplingProfiler(interval=0.001).run(worker.ident, 0.1)
+        finally:
+            stop.set()
+            worker.join()
+
+        output = format_collapsed(stacks)
+        self.assertIn("busy_loop", output)
+        for line in output.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(int(count) > 0)
@@ -0,0 +1,111 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.events import ClickEvent, ClickWriter
+from app.main import app, get_storage
+from app.storage import SQLAlchemyStorage
+from app.url_compression import prefix_cache
+from app.utils import hash_visitor
+
+# 엔드포인트별 SQL 문 / 커밋 / 왕복 예산입니다. 핫 패스에 쿼리를 추가하려면 이 값을 함께 수정해야 합니다.
+QUERY_BUDGETS = {
+    "POST /shorten": {"statements": 3, "commits": 1, "round_trips": 4},  # 중복 확인 SELECT, INSERT, refresh SELECT
+    "GET /{short_url}": {"statements": 1, "commits": 0, "round_trips": 1},  # 조회 수 증가는 클릭 이벤트 워커가 처리
+    "GET /stats/{short_url}": {"statements": 1, "commits": 0, "round_trips": 1},  # 조회 수와 방문자 스케치를 한 번에 조회
+    "click batch": {"statements": 1, "commits": 1, "round_trips": 2},  # 묶음 전체를 하나의 executemany UPDATE로 반영
+    "sketch flush": {"statements": 2, "commits": 1, "round_trips": 3},  # SELECT ... FOR UPDATE, executemany UPDATE
+}
+
+
+@pytest.fixture
+def sqlalchemy_storage(db_engine, session_factory):
+    return SQLAlchemyStorage(session_factory, db_engine)
+
+
+@pytest.fixture
+def client(sqlalchemy_storage):
+    app.dependency_overrides[get_storage] = lambda: sqlalchemy_storage
+    with patch("app.main.click_pipeline", new_callable=AsyncMock) as mock_click_pipeline:
+        mock_click_pipeline.estimate_unique_visitors = MagicMock(return_value=0)
+        yield TestClient(app)
+    app.dependency_overrides.pop(get_storage, None)
+
+
+def shorten(client, url="http://example.com"):
+    response = client.post("/shorten", json={"url": url})
+    assert response.status_code == 200
+    return response.json()["short_url"]
+
+
+def test_shorten_query_budget(client, query_counter):
+    with query_counter:
+        shorten(client)
+    query_counter.assert_budget(**QUERY_BUDGETS["POST /shorten"])
+
+
+def test_redirect_query_budget(client, query_counter):
+    short_url = shorten(client)
+    with query_counter:
+        response = client.get(f"/{short_url}", allow_redirects=False)
+    assert response.status_code == 301
+    query_counter.assert_budget(**QUERY_BUDGETS["GET /{short_url}"])
+    # 방문자 스케치는 지연 로딩되므로 리디렉션 조회에서 읽지 않아야 합니다.
+    assert not any("visitor_sketch" in statement for statement in query_counter.statements)
+
+
+async def test_redirect_with_prefix_compression_query_budget(client, session_factory, query_counter):
+    # 접두사는 일괄 변환으로 등록되고 단축 URL 생성 시 캐시되므로 복원에 추가 쿼리가 없어야 합니다.
+    prefix_cache.clear()
+    async with session_factory() as db:
+        await prefix_cache.intern(db, "https://www.example.com/articles/")
+    with patch("app.url_compression.URL_COMPRESSION", "prefix"):
+        short_url = shorten(client, "https://www.example.com/articles/1?utm_source=newsletter")
+    with query_counter:
+        response = client.get(f"/{short_url}", allow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://www.example.com/articles/1?utm_source=newsletter"
+    query_counter.assert_budget(**QUERY_BUDGETS["GET /{short_url}"])
+    async with session_factory() as db:
+        assert (await crud.get_url_by_short_url(db, short_url)).prefix_id is not None
+
+
+def test_redirect_not_found_query_budget(client, query_counter):
+    with query_counter:
+        response = client.get("/missing")
+    assert response.status_code == 404
+    query_counter.assert_budget(**QUERY_BUDGETS["GET /{short_url}"])
+
+
+def test_stats_query_budget(client, query_counter):
+    short_url = shorten(client)
+    with query_counter:
+        response = client.get(f"/stats/{short_url}")
+    assert response.status_code == 200
+    query_counter.assert_budget(**QUERY_BUDGETS["GET /stats/{short_url}"])
+
+
+def test_top_urls_does_not_query(client, query_counter):
+    with query_counter:
+        response = client.get("/stats/top")
+    assert response.status_code == 200
+    query_counter.assert_budget(statements=0, round_trips=0)
+
+
+async def test_click_batch_query_budget(client, sqlalchemy_storage, session_factory, query_counter):
+    short_urls = [shorten(client, f"http://example.com/{i}") for i in range(3)]
+    writer = ClickWriter(sqlalchemy_storage)
+    events = [ClickEvent(short_url, hash_visitor(str(i), "agent")) for i, short_url in enumerate(short_urls * 10)]
+
+    with query_counter:
+        await writer.write(events)
+    query_counter.assert_budget(**QUERY_BUDGETS["click batch"])
+
+    with query_counter:
+        await writer.write([], final=True)
+    query_counter.assert_budget(**QUERY_BUDGETS["sketch flush"])
+
+    async with session_factory() as db:
+        assert await crud.get_view_count(db, short_urls[0]) == 10
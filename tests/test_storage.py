@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.hll import HyperLogLog
+from app.main import app, get_storage
+from app.sqlite_storage import SQLiteStorage
+from app.utils import hash_visitor
+
+# 이 모듈의 테스트는 conftest.py의 storage 픽스처를 통해 모든 저장소 백엔드에 대해 실행됩니다.
+
+
+async def test_create_and_resolve(storage):
+    expiration_date = datetime.utcnow() + timedelta(days=1)
+    created = await storage.create("http://example.com", "short1", expiration_date)
+    assert created.short_url == "short1"
+
+    resolved = await storage.resolve("short1")
+    assert resolved.id == created.id
+    assert resolved.url == "http://example.com"
+    assert resolved.expiration_date == expiration_date
+    assert await storage.resolve("missing") is None
+
+
+async def test_resolve_expired(storage):
+    await storage.create("http://example.com", "expired", datetime.utcnow() - timedelta(seconds=1))
+    assert await storage.resolve("expired") is None
+
+
+async def test_increment_and_stats(storage):
+    await storage.create("http://example.com/a", "a", None)
+    await storage.create("http://example.com/b", "b", None)
+    await storage.increment({"a": 3, "b": 1})
+    await storage.increment({"a": 2})
+
+    assert (await storage.stats("a")).view_count == 5
+    assert (await storage.stats("b")).view_count == 1
+    assert await storage.stats("missing") is None
+
+
+async def test_merge_visitor_sketches(storage):
+    await storage.create("http://example.com", "short1", None)
+    for visitors in (("a", "b"), ("b", "c")):
+        sketch = HyperLogLog()
+        for visitor in visitors:
+            sketch.add(hash_visitor(visitor, "agent"))
+        await storage.merge_visitor_sketches({"short1": sketch, "missing": sketch})
+
+    stats = await storage.stats("short1")
+    assert HyperLogLog.from_bytes(stats.visitor_sketch).estimate() == 3
+
+
+async def test_purge(storage):
+    await storage.create("http://example.com/old", "old", datetime.utcnow() - timedelta(days=1))
+    await storage.create("http://example.com/new", "new", datetime.utcnow() + timedelta(days=1))
+    await storage.create("http://example.com/forever", "forever", None)
+    await storage.purge()
+
+    assert await storage.stats("old") is None
+    assert await storage.stats("new") is not None
+    assert await storage.stats("forever") is not None
+
+
+async def test_trending_snapshots(storage):
+    await storage.save_trending("worker1", b"first", datetime.utcnow() - timedelta(minutes=1))
+    await storage.save_trending("worker2", b"second", datetime.utcnow() - timedelta(minutes=1))
+    await storage.save_trending("worker1", b"updated", datetime.utcnow() - timedelta(minutes=1))
+    assert await storage.load_trending() == {"worker1": b"updated", "worker2": b"second"}
+
+    # 기준 시각 이전에 갱신된 다른 워커의 스냅샷은 삭제되어야 합니다.
+    await storage.save_trending("worker2", b"latest", datetime.utcnow() + timedelta(seconds=1))
+    assert await storage.load_trending() == {}
+    await storage.save_trending("worker2", b"latest", datetime.utcnow() - timedelta(minutes=1))
+    assert await storage.load_trending() == {"worker2": b"latest"}
+
+
+def test_endpoints(storage):
+    app.dependency_overrides[get_storage] = lambda: storage
+    try:
+        with patch("app.main.click_pipeline", new_callable=AsyncMock) as mock_click_pipeline:
+            mock_click_pipeline.estimate_unique_visitors = MagicMock(return_value=0)
+            client = TestClient(app)
+
+            response = client.post("/shorten", json={"url": "http://example.com"})
+            assert response.status_code == 200
+            short_url = response.json()["short_url"]
+
+            response = client.get(f"/{short_url}", allow_redirects=False)
+            assert response.status_code == 301
+            assert response.headers["location"] == "http://example.com"
+
+            response = client.get(f"/stats/{short_url}")
+            assert response.status_code == 200
+            assert response.json()["view_count"] == 0
+    finally:
+        app.dependency_overrides.pop(get_storage, None)
+
+
+async def test_sqlite_uses_wal_and_read_only_readers(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "wal.db"), readers=1)
+    await storage.initialize()
+    try:
+        assert storage._writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        reader = storage._reader_pool.get()
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM urls")
+        storage._reader_pool.put(reader)
+    finally:
+        await storage.close()
+
+
+def test_embedded_backend_starts_without_database_url(tmp_path):
+    # sqlite 백엔드는 PostgreSQL 설정 없이도 app.main을 불러올 수 있어야 합니다.
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    env.update(STORAGE_BACKEND="sqlite", SQLITE_PATH=str(tmp_path / "urls.db"), PYTHONPATH=os.getcwd())
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; assert 'app.database' not in sys.modules"],
+        cwd=tmp_path, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
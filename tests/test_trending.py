@@ -0,0 +1,132 @@
+import json
+import time
+import unittest
+
+from app.trending import DecayedSpaceSaving, TrendingSync, TrendingTracker
+
+# 스케치의 기준 시각과 가까운 시각을 사용해 감쇠 계산이 테스트 시점에 좌우되지 않도록 합니다.
+T0 = time.monotonic()
+
+
+class TestDecayedSpaceSaving(unittest.TestCase):
+    def test_top_orders_by_count(self):
+        """
+        상위 항목 정렬 테스트:
+        - 많이 조회된 항목이 먼저 반환되어야 합니다.
+        """
+        sketch = DecayedSpaceSaving(capacity=10, half_life=60)
+        for key, hits in (("a", 5), ("b", 10), ("c", 1)):
+            for _ in range(hits):
+                sketch.add(key, now=T0)
+        top = sketch.top(2, now=T0)
+        self.assertEqual([key for key, _ in top], ["b", "a"])
+        self.assertAlmostEqual(top[0][1], 10.0)
+
+    def test_decay_prefers_recent(self):
+        """
+        시간 감쇠 테스트:
+        - 오래전 조회는 반감기마다 절반으로 줄어들어, 최근 조회가 더 높은 순위를 가져야 합니다.
+        """
+        sketch = DecayedSpaceSaving(capacity=10, half_life=60)
+        for _ in range(10):
+            sketch.add("old", now=T0)
+        for _ in range(4):
+            sketch.add("new", now=T0 + 120)
+        top = sketch.top(2, now=T0 + 120)
+        self.assertEqual(top[0][0], "new")
+        self.assertAlmostEqual(dict(top)["old"], 2.5)
+
+    def test_capacity_is_bounded(self):
+        """
+        용량 제한 테스트:
+        - 카운터 수는 capacity를 넘지 않고, 자주 조회된 항목은 유지되어야 합니다.
+        """
+        sketch = DecayedSpaceSaving(capacity=4, half_life=60)
+        for _ in range(100):
+            sketch.add("hot", now=T0)
+        for i in range(50):
+            sketch.add(f"cold{i}", now=T0)
+        self.assertEqual(len(sketch), 4)
+        self.assertEqual(sketch.top(1, now=T0)[0][0], "hot")
+
+    def test_evicts_smallest_counter(self):
+        """
+        대체 대상 선택 테스트:
+        - 카운터가 가득 차면 힙에 남은 오래된 값과 관계없이 현재 가장 작은 카운터를 대체해야 합니다.
+        """
+        sketch = DecayedSpaceSaving(capacity=3, half_life=60)
+        for key in ("a", "b", "c"):
+            sketch.add(key, now=T0)
+        sketch.add("a", count=5, now=T0)
+        sketch.add("c", count=2, now=T0)
+        sketch.add("d", now=T0)
+        top = dict(sketch.top(3, now=T0))
+        self.assertEqual(set(top), {"a", "c", "d"})
+        self.assertAlmostEqual(top["d"], 2.0)  # 대체된 b의 값 1이 오차로 더해집니다.
+        self.assertEqual(sorted(key for _, key in sketch._heap), ["a", "c", "d"])
+
+    def test_rescale_keeps_scores(self):
+        """
+        기준 시각 이동 테스트:
+        - 오랜 시간이 지나 기준 시각을 옮겨도 점수가 유지되어야 합니다.
+        """
+        sketch = DecayedSpaceSaving(capacity=4, half_life=1)
+        sketch.add("a", now=T0)
+        sketch.add("b", now=T0 + 100)
+        self.assertAlmostEqual(dict(sketch.top(2, now=T0 + 100))["b"], 1.0)
+
+    def test_merge_snapshot(self):
+        """
+        워커 간 병합 테스트:
+        - 다른 스케치의 스냅샷을 합치면 조회 수가 더해져야 합니다.
+        """
+        left = DecayedSpaceSaving(capacity=10, half_life=60)
+        right = DecayedSpaceSaving(capacity=10, half_life=60)
+        left.add("a", now=T0)
+        right.add("a", now=T0)
+        right.add("b", now=T0)
+        left.merge(right.snapshot(now=T0), now=T0)
+        top = dict(left.top(2, now=T0))
+        self.assertAlmostEqual(top["a"], 2.0)
+        self.assertAlmostEqual(top["b"], 1.0)
+
+class TestTrendingTracker(unittest.TestCase):
+    def test_merge_remote_snapshots(self):
+        """
+        다른 워커 스냅샷 병합 테스트:
+        - 다른 워커의 조회가 현재 워커의 조회와 합산되고, 기록된 뒤 지난 시간만큼 감쇠되어야 합니다.
+        """
+        local, other = TrendingTracker(), TrendingTracker()
+        local.record("a")
+        other.record("a", 2)
+        other.record("b", 4)
+        stale = json.loads(other.to_bytes())
+        stale["time"] -= 300  # 5m 구간의 반감기만큼 이전에 기록된 스냅샷입니다.
+
+        local.merge_remote([other.to_bytes()])
+        top = dict(local.top("5m", 2))
+        self.assertAlmostEqual(top["a"], 3.0, places=2)
+        self.assertAlmostEqual(top["b"], 4.0, places=2)
+
+        local.merge_remote([json.dumps(stale).encode()])
+        top = dict(local.top("5m", 2))
+        self.assertAlmostEqual(top["a"], 2.0, places=2)
+        self.assertAlmostEqual(top["b"], 2.0, places=2)
+        with self.assertRaises(KeyError):
+            local.top("7m", 1)
+
+
+async def test_sync_aggregates_workers(storage):
+    # 같은 저장소를 사용하는 두 워커가 서로의 조회를 합산해야 합니다.
+    trackers = [TrendingTracker(), TrendingTracker()]
+    syncs = [TrendingSync(storage, tracker, worker_id=f"worker{i}") for i, tracker in enumerate(trackers)]
+    trackers[0].record("hot", 3)
+    trackers[1].record("hot", 2)
+    trackers[1].record("cold")
+    for sync in syncs + syncs:
+        await sync.sync()
+
+    for tracker in trackers:
+        top = tracker.top("5m", 2)
+        assert [key for key, _ in top] == ["hot", "cold"]
+        assert abs(top[0][1] - 5.0) < 0.01
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy.future import select
+
+from app import crud, models
+from app.url_compression import PrefixCache, backfill, compression_report, prefix_cache, prefix_candidates, split_url
+
+URLS = [f"https://www.example.com/articles/{i}?utm_source=newsletter" for i in range(20)] + [
+    f"https://github.com/user{i}/project" for i in range(3)
+] + [
+    "https://docs.example.org/guide/intro#setup",
+    "https://example.net",
+    "mailto:someone@example.com",
+]
+# 공유 접두사 https://www.example.com/articles/ 와 https://github.com/ 로 압축되는 항목 수입니다.
+COMPRESSED = 23
+
+
+@pytest.fixture(autouse=True)
+def clear_prefix_cache():
+    # 테스트마다 새 데이터베이스를 사용하므로 이전 테스트의 접두사 id가 남지 않도록 합니다.
+    prefix_cache.clear()
+    yield
+    prefix_cache.clear()
+
+
+@pytest.mark.parametrize("url, depth, expected", [
+    ("https://www.example.com/articles/123?x=/y", 1, ("https://www.example.com/articles/", "123?x=/y")),
+    ("https://www.example.com/a/b/c", 2, ("https://www.example.com/a/b/", "c")),
+    ("https://www.example.com/a/b/c", 0, ("https://www.example.com/", "a/b/c")),
+    ("https://example.net", 1, ("https://example.net", "")),
+    ("https://example.net?q=1", 1, ("https://example.net", "?q=1")),
+    ("mailto:someone@example.com", 1, (None, "mailto:someone@example.com")),
+])
+def test_split_url(url, depth, expected):
+    assert split_url(url, depth) == expected
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://github.com/user1/project", [("https://github.com/user1/", "project"), ("https://github.com/", "user1/project")]),
+    ("https://github.com/project", [("https://github.com/", "project")]),
+    ("https://example.net?q=1", [("https://example.net", "?q=1")]),
+    ("https://example.net", []),
+    ("mailto:someone@example.com", []),
+])
+def test_prefix_candidates(url, expected):
+    # 접미사가 비는 후보는 저장 공간을 늘리므로 제외되어야 합니다.
+    assert list(prefix_candidates(url, 1)) == expected
+
+
+async def test_backfill_and_reassembly(session_factory):
+    async with session_factory() as db:
+        for i, url in enumerate(URLS):
+            await crud.create_url(db, url, f"s{i}", None)
+
+    assert await backfill(session_factory, batch_size=7, min_rows=3) == COMPRESSED
+    # 다시 실행하면 남은 항목이 없어야 합니다.
+    assert await backfill(session_factory, batch_size=7, min_rows=3) == 0
+
+    prefix_cache.clear()
+    async with session_factory() as db:
+        prefixes = (await db.execute(select(models.URLPrefix.prefix))).scalars().all()
+        # 사용자별 경로는 호스트 접두사로 대신하고, 공유되지 않는 접두사는 등록하지 않아야 합니다.
+        assert sorted(prefixes) == ["https://github.com/", "https://www.example.com/articles/"]
+        rows = (await db.execute(select(models.URL.url, models.URL.prefix_id))).all()
+        assert sum(url is None for url, _ in rows) == COMPRESSED
+        for i, url in enumerate(URLS):
+            assert (await crud.get_url_by_short_url(db, f"s{i}")).url == url
+        report = await compression_report(db)
+
+    assert report.rows == len(URLS)
+    assert report.compressed_rows == COMPRESSED
+    assert report.prefixes == 2
+    assert report.original_size == sum(len(url) for url in URLS)
+    assert report.ratio > 1.5
+
+
+async def test_compressed_create(session_factory, monkeypatch):
+    monkeypatch.setattr("app.url_compression.URL_COMPRESSION", "prefix")
+    async with session_factory() as db:
+        await prefix_cache.intern(db, "https://www.example.com/articles/")
+        await prefix_cache.intern(db, "https://github.com/")
+        for i, url in enumerate(URLS[:3]):
+            db_url = await crud.create_url(db, url, f"s{i}", None)
+            assert db_url.url == url
+            assert db_url.url_suffix == url.rsplit("/", 1)[1]
+            assert not db.dirty
+        # 경로 접두사가 등록되지 않았으면 호스트 접두사를, 그것도 없으면 압축하지 않아야 합니다.
+        db_url = await crud.create_url(db, URLS[20], "u0", None)
+        assert (db_url.url_suffix, db_url.url) == ("user0/project", URLS[20])
+        db_url = await crud.create_url(db, URLS[23], "d0", None)
+        assert (db_url.prefix_id, db_url.url_suffix) == (None, None)
+        prefixes = (await db.execute(select(models.URLPrefix.prefix))).scalars().all()
+    assert sorted(prefixes) == ["https://github.com/", "https://www.example.com/articles/"]
+
+    async with session_factory() as db:
+        assert (await crud.get_url_by_short_url(db, "s2")).url == URLS[2]
+
+
+async def test_prefix_cache_evicts_least_recently_used(session_factory):
+    cache = PrefixCache(maxsize=2)
+    async with session_factory() as db:
+        ids = [await cache.intern(db, f"https://host{i}.example.com/") for i in range(2)]
+        await cache.get(db, ids[0])
+        await cache.intern(db, "https://host2.example.com/")
+        # 최근에 사용한 접두사는 남고 가장 오래 사용하지 않은 접두사만 내보내야 합니다.
+        assert len(cache) == 2
+        assert ids[0] in cache._by_id and ids[1] not in cache._by_id
+
+        expired = PrefixCache(miss_ttl=0)
+        for lookup_cache in (cache, expired):
+            assert await lookup_cache.lookup(db, "https://unknown.example.com/") is None
+        await prefix_cache.intern(db, "https://unknown.example.com/")
+        # 등록되지 않은 접두사 조회 결과는 miss_ttl 동안만 캐시되어야 합니다.
+        assert await cache.lookup(db, "https://unknown.example.com/") is None
+        assert await expired.lookup(db, "https://unknown.example.com/") is not None